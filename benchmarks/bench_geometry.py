@@ -0,0 +1,89 @@
+"""Benchmark slotted peachy.geo shapes against the previous dict-backed shapes.
+
+Creates 100k rectangles of each kind and reports memory use, construction time,
+unpacking time and peachy.collision.rect_rect throughput.
+
+Usage:
+    python -m benchmarks.bench_geometry
+"""
+import random
+import time
+import tracemalloc
+
+import peachy.collision
+import peachy.geo
+
+COUNT = 100000
+
+
+class DictRect(object):
+    """peachy.geo.Rect as it was before using __slots__."""
+
+    def __init__(self, x, y, width, height):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def __getitem__(self, i):
+        return self.ls()[i]
+
+    def __iter__(self):
+        for attribute in self.ls():
+            yield attribute
+
+    def ls(self):
+        return [self.x, self.y, self.width, self.height]
+
+
+def dict_rect_rect(rect_a, rect_b):
+    """peachy.collision.rect_rect as it was before attribute fast paths."""
+    ax, ay, awidth, aheight = rect_a
+    bx, by, bwidth, bheight = rect_b
+    return (ax < bx + bwidth and ax + awidth > bx and
+            ay < by + bheight and ay + aheight > by)
+
+
+def measure(rect_class, rect_rect, values):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rects = [rect_class(*value) for value in values]
+    created = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for rect in rects:
+        x, y, width, height = rect
+    unpacked = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for rect_a, rect_b in zip(rects, rects[1:]):
+        rect_rect(rect_a, rect_b)
+    collided = time.perf_counter() - start
+
+    return memory, created, unpacked, collided
+
+
+def main():
+    rng = random.Random(0)
+    values = [(rng.random() * 1000, rng.random() * 1000, 16, 16)
+              for _ in range(COUNT)]
+
+    print('{} rects'.format(COUNT))
+    print('{:>8} {:>12} {:>12} {:>12} {:>14}'.format(
+        'class', 'memory (MB)', 'create (ms)', 'unpack (ms)',
+        'rect_rect (ms)'))
+
+    for name, rect_class, rect_rect in (
+            ('dict', DictRect, dict_rect_rect),
+            ('slots', peachy.geo.Rect, peachy.collision.rect_rect)):
+        memory, created, unpacked, collided = measure(
+            rect_class, rect_rect, values)
+        print('{:>8} {:>12.1f} {:>12.1f} {:>12.1f} {:>14.1f}'.format(
+            name, memory / 2**20, created * 1000, unpacked * 1000,
+            collided * 1000))
+
+
+if __name__ == '__main__':
+    main()
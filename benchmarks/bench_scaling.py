@@ -0,0 +1,58 @@
+"""Benchmark the per-frame cost of scaling the canvas up to the window.
+
+Times Engine._scale_canvas for every scale mode at 1x through 4x, alongside the
+generic pygame.transform.scale that Engine.run used to call every frame.
+
+Usage:
+    python -m benchmarks.bench_scaling
+
+    Set SDL_VIDEODRIVER=dummy (and SDL_AUDIODRIVER=dummy) to run headless.
+"""
+import time
+
+import pygame
+
+import peachy
+import peachy.config
+
+CANVAS_SIZE = (320, 240)
+SCALES = (1, 2, 3, 4)
+MODES = (peachy.config.SCALE_NEAREST, peachy.config.SCALE_2X,
+         peachy.config.SCALE_SMOOTH)
+FRAMES = 200
+
+
+def time_frames(function):
+    function()
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        function()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main():
+    engine = peachy.Engine(CANVAS_SIZE)
+
+    print('{:>6} {:>14}'.format('scale', 'generic (ms)') +
+          ''.join(' {:>14}'.format(mode + ' (ms)') for mode in MODES))
+
+    for scale in SCALES:
+        engine.scale = scale
+        window = engine._window_surface
+        canvas = pygame.Surface(CANVAS_SIZE)
+
+        generic = time_frames(lambda: pygame.transform.scale(
+            canvas, engine.window_size, window))
+
+        row = '{:>6} {:>14.3f}'.format('{0}x'.format(scale), generic * 1000)
+        for mode in MODES:
+            engine.scale_mode = mode
+            elapsed = time_frames(engine._scale_canvas)
+            row += ' {:>14.3f}'.format(elapsed * 1000)
+        print(row)
+
+    engine.quit()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark collision queries with and without Room's spatial hash.
+
+Fills a Room with N small solid rect entities scattered at a constant density
+and times peachy.collision.collides_solid for a sample of them. Frame time is
+estimated as if every entity performed one query per frame.
+
+Usage:
+    python -m benchmarks.bench_spatial_hash
+"""
+import random
+import time
+
+import peachy
+import peachy.collision
+import peachy.geo
+
+SIZES = (1000, 5000, 20000)
+SAMPLES = 200
+DENSITY = 1 / 4096.0  # entities per square pixel
+
+
+class RectEntity(peachy.Entity, peachy.geo.Rect):
+    def __init__(self, x, y, width, height):
+        peachy.Entity.__init__(self)
+        peachy.geo.Rect.__init__(self, x, y, width, height)
+        self.solid = True
+
+
+def build_room(count, seed=0):
+    rng = random.Random(seed)
+    side = int((count / DENSITY) ** 0.5)
+    room = peachy.Room(None)
+    for _ in range(count):
+        room.add(RectEntity(rng.uniform(0, side), rng.uniform(0, side), 8, 8))
+    return room
+
+
+def time_queries(room, samples):
+    collides_solid = peachy.collision.collides_solid
+    start = time.perf_counter()
+    for entity in samples:
+        collides_solid(room, entity)
+    return (time.perf_counter() - start) / len(samples)
+
+
+def main():
+    print('{:>8} {:>14} {:>14} {:>10}'.format(
+        'entities', 'linear (ms/f)', 'hashed (ms/f)', 'speedup'))
+
+    for count in SIZES:
+        room = build_room(count)
+        samples = random.Random(1).sample(list(room), SAMPLES)
+
+        linear = time_queries(room, samples)
+        room.enable_spatial_hash(cell_size=32)
+        hashed = time_queries(room, samples)
+
+        print('{:>8} {:>14.2f} {:>14.2f} {:>9.1f}x'.format(
+            count, linear * count * 1000, hashed * count * 1000,
+            linear / hashed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark rendering a large tile layer per tile and pre-rendered in chunks.
+
+Renders a fully populated 200x200 layer of 16x16 tiles through a 640x480 view
+and reports the time per frame of each approach: drawing every tile the layer
+yields, drawing only the tiles inside of the view, and drawing chunks.
+
+Usage:
+    python -m benchmarks.bench_tile_layer
+"""
+import time
+
+import pygame
+
+import peachy.graphics
+import peachy.stage
+
+MAP_SIZE = 200
+TILE_SIZE = 16
+VIEW_SIZE = (640, 480)
+FRAMES = 20
+
+
+class Stage(object):
+    tilewidth = TILE_SIZE
+    tileheight = TILE_SIZE
+
+
+class Map(object):
+    def __init__(self, image):
+        self.images = [None, image]
+
+
+class Layer(object):
+    """Mimics pytmx.TiledTileLayer."""
+
+    def __init__(self, image):
+        self.parent = Map(image)
+        self.width = MAP_SIZE
+        self.height = MAP_SIZE
+        self.data = [[1] * MAP_SIZE for _ in range(MAP_SIZE)]
+        self.chunks = None
+
+    def tiles(self):
+        for y in range(MAP_SIZE):
+            for x in range(MAP_SIZE):
+                yield x, y, self.parent.images[self.data[y][x]]
+
+
+def time_frames(function):
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        function()
+    return (time.perf_counter() - start) / FRAMES
+
+
+def main():
+    canvas = pygame.Surface(VIEW_SIZE)
+    peachy.graphics.set_default_context(canvas)
+    peachy.graphics.set_context(canvas)
+    peachy.graphics.translate(1000, 1000)
+
+    stage = Stage()
+    layer = Layer(pygame.Surface((TILE_SIZE, TILE_SIZE)))
+
+    def render_all():
+        for x, y, image in layer.tiles():
+            peachy.graphics.draw(image, x * TILE_SIZE, y * TILE_SIZE)
+
+    def render():
+        peachy.stage.render_tiled_layer(stage, layer)
+
+    every_tile = time_frames(render_all)
+    culled = time_frames(render)
+
+    start = time.perf_counter()
+    layer.chunks = peachy.stage.ChunkedLayer(stage, layer)
+    bake = time.perf_counter() - start
+    chunked = time_frames(render)
+
+    print('{:>14} {:>12} {:>14} {:>10} {:>8}'.format(
+        'all tiles (ms)', 'culled (ms)', 'chunked (ms)', 'bake (ms)',
+        'chunks'))
+    print('{:>14.2f} {:>12.2f} {:>14.2f} {:>10.1f} {:>8}'.format(
+        every_tile * 1000, culled * 1000, chunked * 1000, bake * 1000,
+        len(layer.chunks.chunks)))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,11 +10,16 @@ Note:
         >>> import peachy.base  # wrong
 """
 
+import bisect
+import itertools
 import logging
+import math
 import os
 import sys
 
 import peachy
+import peachy.collision
+import peachy.config
 import peachy.fs
 import peachy.graphics
 import peachy.utils
@@ -22,8 +27,6 @@ import peachy.utils
 import pygame
 import pygame.locals
 
-from peachy.utils import list_wrap
-
 
 # A global reference to the current peachy.Engine is None until a peachy.Engine
 # has been initialized
@@ -40,6 +43,12 @@ def _set_PC(PC):
     _PC = PC
 
 
+def _validate_scale_mode(mode):
+    if mode not in peachy.config.SCALE_MODES:
+        raise ValueError('Unknown scale mode: {0}'.format(mode))
+    return mode
+
+
 class Engine(object):
     """The central controlling class for Peachy.
 
@@ -51,10 +60,21 @@ class Engine(object):
             this engine.
         world (peachy.World): Reference to the currently active World.
         canvas_size (tuple[int, int]): Contains width and height, respectively.
+        config (peachy.config.PeachyConfiguration): Engine configuration.
+            Timing fields (UPDATES_PER_SECOND, MAX_FRAMESKIP) are read every
+            frame, VARIABLE_TIMESTEP when run() is called.
+        interpolation (float): How far, between 0 and 1, the current render
+            lies between the previous and the next fixed update. Use inside
+            render() to interpolate the positions of moving entities. Always 0
+            when VARIABLE_TIMESTEP is enabled.
     """
 
+    """The maximum amount of dirty rects pushed to the display each frame
+    before falling back to presenting the entire window."""
+    DIRTY_RECT_LIMIT = 64
+
     def __init__(self, canvas_size=(640, 480), title='', fps=60, scale=1,
-                 debug=False):
+                 debug=False, dirty_rects=False, scale_mode=None):
         """Initialize Engine
 
         Initializes peachy configuration and initializes pygame.
@@ -72,6 +92,14 @@ class Engine(object):
             debug (bool, optional): Enable debug mode (cannot change once game
                 run() is called). Disabled by default. Can also be set via
                 PeachyConfiguration.
+            dirty_rects (bool, optional): Enable dirty rect rendering, see
+                Engine.dirty_rects. Disabled by default.
+            scale_mode (str, optional): Filter used to scale the canvas up to
+                the window, see Engine.scale_mode. Defaults to
+                PeachyConfiguration.VIEW_SCALE_MODE.
+
+        Raises:
+            ValueError: scale_mode is not a valid scale mode.
         """
         # Set global PC reference
         _set_PC(self)
@@ -79,12 +107,19 @@ class Engine(object):
         self.worlds = {}
         self.world = None
 
+        self.config = peachy.config.PeachyConfiguration()
+        self.interpolation = 0
+        self._accumulator = 0
+
         # TODO config
         self.background_color = (0, 0, 0)
         self.debug_enabled = debug
         self.fps = fps if fps > 0 else 60
         self.__title = title
         self.__scale = scale
+        if scale_mode is None:
+            scale_mode = self.config.VIEW_SCALE_MODE
+        self.__scale_mode = _validate_scale_mode(scale_mode)
         # End config
 
         # Canvas
@@ -97,6 +132,14 @@ class Engine(object):
         self.window_size = (canvas_width * scale, canvas_height * scale)
         self._window_surface = None
 
+        # Intermediate surfaces used by SCALE_2X, or None if not yet created
+        self._scale_buffers = None
+
+        # Dirty rect rendering. Regions drawn to during the previous frame, or
+        # None if the entire window must be redrawn.
+        self.__dirty_rects = dirty_rects
+        self._dirty_previous = None
+
         # Initialize pygame
         try:
             os.environ['SDL_VIDEO_CENTERED'] = '1'
@@ -126,10 +169,7 @@ class Engine(object):
         flags = pygame.locals.DOUBLEBUF
 
         self._window_surface = pygame.display.set_mode(self.window_size, flags)
-        self._canvas_surface = pygame.Surface(self.canvas_size)
-
-        peachy.graphics.set_default_context(self._canvas_surface)
-        peachy.graphics.set_context(self._canvas_surface)
+        self._set_canvas()
 
         try:
             peachy.graphics.__font = peachy.graphics.Font(
@@ -173,6 +213,23 @@ class Engine(object):
         self.__title = t
         pygame.display.set_caption(t)
 
+    @property
+    def dirty_rects(self):
+        """bool: Is dirty rect rendering enabled?
+        Instead of clearing and presenting the entire window each frame, only
+        the regions drawn to by peachy.graphics during this frame and the
+        previous frame are cleared, scaled and pushed to the display. Benefits
+        mostly static scenes, such as menus and turn based games. Everything
+        must still be rendered each frame.
+        """
+        return self.__dirty_rects
+
+    @dirty_rects.setter
+    def dirty_rects(self, enabled):
+        self.__dirty_rects = enabled
+        self._dirty_previous = None
+        peachy.graphics.set_dirty_tracking(False)
+
     @property
     def scale(self):
         """int: The scale of the base rendering surface
@@ -186,6 +243,27 @@ class Engine(object):
         self.__scale = s
         self.window_size = (self.canvas_width * s, self.canvas_height * s)
         self._window_surface = pygame.display.set_mode(self.window_size)
+        self._set_canvas()
+
+    @property
+    def scale_mode(self):
+        """str: The filter used to scale the canvas up to the window. One of
+        peachy.config.SCALE_NEAREST, SCALE_2X or SCALE_SMOOTH.
+        SCALE_2X doubles the canvas (see pygame.transform.scale2x) as many
+        times as fits inside of the window and scales the remainder using
+        nearest neighbor. No scaling is performed when the canvas and window
+        are the same size, regardless of mode.
+
+        Raises:
+            ValueError: Set to an invalid scale mode.
+        """
+        return self.__scale_mode
+
+    @scale_mode.setter
+    def scale_mode(self, mode):
+        self.__scale_mode = _validate_scale_mode(mode)
+        self._scale_buffers = None
+        self._dirty_previous = None
 
     def add_world(self, world, name=''):
         """Add world to the Engine
@@ -284,9 +362,7 @@ class Engine(object):
             pygame.display.set_mode(self.window_size, flags, bits)
 
         self.canvas_size = (width, height)
-        self._canvas_surface = pygame.Surface(self.canvas_size)
-        peachy.graphics.set_default_context(self._canvas_surface)
-        peachy.graphics.set_context(self._canvas_surface)
+        self._set_canvas()
 
     def run(self):
         """Start game.
@@ -294,6 +370,12 @@ class Engine(object):
         This function runs the game loop and is the root from which operations
         are invoked. Exits only once game is done running.
 
+        Updates are run on a fixed timestep of 1 / config.UPDATES_PER_SECOND,
+        independent of the render rate (self.fps). When rendering falls behind,
+        up to config.MAX_FRAMESKIP renders are skipped so updates can catch
+        up. Enable config.VARIABLE_TIMESTEP to run exactly one update per
+        render instead.
+
         Calls preload() before entering game loop.
         """
 
@@ -303,6 +385,14 @@ class Engine(object):
         self.preload()
         self.world.enter()
 
+        variable_timestep = self.config.VARIABLE_TIMESTEP
+        elapsed = 0
+
+        # Guarantee an update before the first render, without counting the
+        # time spent in preload() as time to catch up on
+        self._accumulator = 1000.0 / self.config.UPDATES_PER_SECOND
+        game_timer.tick()
+
         running = True
         while running:
             # Parse events
@@ -313,24 +403,18 @@ class Engine(object):
                 elif event.type == pygame.locals.VIDEORESIZE:
                     self.resize(event.w, event.h)
 
-            peachy.utils.Input.poll()
-
             # Update
-            self.__update()
+            if variable_timestep:
+                peachy.utils.Input.poll()
+                self.__update()
+            else:
+                self._step(elapsed)
 
-            # Render - Draw World
+            # Render
             self.__render()
 
-            # Render - Transformations
-            # TODO speed up scaling
-            pygame.transform.scale(self._canvas_surface, self.window_size,
-                                   self._window_surface)
-
-            # Render - Finalize
-            pygame.display.flip()
-
             # Maintain fps (display fps if DEBUG is active)
-            game_timer.tick(self.fps)
+            elapsed = game_timer.tick(self.fps)
             if self.debug_enabled:
                 fps = round(game_timer.get_fps())
                 pygame.display.set_caption(self.__title +
@@ -341,6 +425,34 @@ class Engine(object):
         pygame.mixer.quit()
         pygame.quit()  # Shutdown all pygame modules
 
+    def _step(self, elapsed):
+        """Run every fixed update that fits in the time accumulated.
+
+        Args:
+            elapsed (float): Milliseconds since the previous step.
+
+        Returns:
+            int: The amount of updates run.
+        """
+        timestep = 1000.0 / self.config.UPDATES_PER_SECOND
+        max_frameskip = self.config.MAX_FRAMESKIP
+        self._accumulator += elapsed
+
+        updates = 0
+        while self._accumulator >= timestep:
+            if 0 <= max_frameskip < updates:
+                # Too far behind, drop the remaining time rather than spiral
+                # into never rendering again.
+                self._accumulator %= timestep
+                break
+            peachy.utils.Input.poll()
+            self.__update()
+            self._accumulator -= timestep
+            updates += 1
+
+        self.interpolation = self._accumulator / timestep
+        return updates
+
     def toggle_fullscreen(self):
         """Toggle fullscreen
 
@@ -375,15 +487,141 @@ class Engine(object):
 
         self._window_surface = pygame.display.set_mode(
             self.window_size, flags ^ pygame.locals.FULLSCREEN, bits)
-        self._canvas_surface = pygame.Surface(self.canvas_size)
-
-        peachy.graphics.set_default_context(self._canvas_surface)
-        peachy.graphics.set_context(self._canvas_surface)
+        self._set_canvas()
 
     def __render(self):
-        self._canvas_surface.fill(self.background_color)
+        previous = self._dirty_previous
+
+        # Render - Draw World
+        if not self.__dirty_rects or previous is None:
+            self._canvas_surface.fill(self.background_color)
+        else:
+            for rect in previous:
+                self._canvas_surface.fill(self.background_color, rect)
+
+        if self.__dirty_rects:
+            peachy.graphics.set_dirty_tracking(True)
         self.world.render()
 
+        if not self.__dirty_rects:
+            self._present()
+            return
+
+        current = peachy.graphics.pop_dirty_rects()
+        self._dirty_previous = current
+        if previous is None or \
+           len(previous) + len(current) > Engine.DIRTY_RECT_LIMIT:
+            self._present()
+        else:
+            self._present(previous + current)
+
+    def _present(self, rects=None):
+        """Scale the canvas onto the window and push it to the display.
+
+        Args:
+            rects (list[pygame.Rect], optional): Only present these regions of
+                the canvas. The entire canvas is presented by default.
+        """
+        if rects is None:
+            self._scale_canvas()
+            pygame.display.flip()
+            return
+
+        canvas_rect = self._canvas_surface.get_rect()
+        window_rect = self._window_surface.get_rect()
+        scale_x = window_rect.width / canvas_rect.width
+        scale_y = window_rect.height / canvas_rect.height
+
+        # Regions can only be scaled apart when every canvas pixel maps onto
+        # a whole block of window pixels. scale2x and smoothscale read
+        # neighboring pixels and non-integer scales round differently per
+        # region, both of which leave seams, so scale the entire canvas
+        # instead and only push the regions.
+        scale_regions = \
+            self._canvas_surface is not self._window_surface and \
+            self.__scale_mode == peachy.config.SCALE_NEAREST and \
+            window_rect.width % canvas_rect.width == 0 and \
+            window_rect.height % canvas_rect.height == 0
+        if not scale_regions:
+            self._scale_canvas()
+
+        updated = []
+        for rect in rects:
+            if not scale_regions:
+                # Filtering bleeds changes into the neighboring pixels
+                rect = rect.inflate(2, 2)
+            rect = rect.clip(canvas_rect)
+            if not rect:
+                continue
+
+            left = int(rect.left * scale_x)
+            top = int(rect.top * scale_y)
+            dest = pygame.Rect(left, top,
+                               int(math.ceil(rect.right * scale_x)) - left,
+                               int(math.ceil(rect.bottom * scale_y)) - top)
+            dest = dest.clip(window_rect)
+            if not dest:
+                continue
+
+            if scale_regions:
+                pygame.transform.scale(self._canvas_surface.subsurface(rect),
+                                       dest.size,
+                                       self._window_surface.subsurface(dest))
+            updated.append(dest)
+
+        pygame.display.update(updated)
+
+    def _scale_canvas(self):
+        """Scale the canvas onto the window using scale_mode."""
+        surface = self._canvas_surface
+        if surface is self._window_surface:
+            return
+
+        if self.__scale_mode == peachy.config.SCALE_SMOOTH:
+            pygame.transform.smoothscale(surface, self.window_size,
+                                         self._window_surface)
+            return
+
+        if self.__scale_mode == peachy.config.SCALE_2X:
+            if self._scale_buffers is None:
+                self._scale_buffers = self.__create_scale_buffers()
+            for buffer in self._scale_buffers:
+                pygame.transform.scale2x(surface, buffer)
+                surface = buffer
+
+        if surface is not self._window_surface:
+            pygame.transform.scale(surface, self.window_size,
+                                   self._window_surface)
+
+    def __create_scale_buffers(self):
+        # One surface per doubling of the canvas that fits inside of the
+        # window. The final doubling renders straight to the window if sizes
+        # match.
+        buffers = []
+        width, height = self.canvas_size
+        window_width, window_height = self.window_size
+        while width * 2 <= window_width and height * 2 <= window_height:
+            width *= 2
+            height *= 2
+            if (width, height) == self.window_size:
+                buffers.append(self._window_surface)
+            else:
+                buffers.append(pygame.Surface((width, height)))
+        return buffers
+
+    def _set_canvas(self):
+        """(Re)create the canvas to match canvas_size and window_size."""
+        if tuple(self.canvas_size) == tuple(self.window_size):
+            # Render straight to the window, no scaling required
+            self._canvas_surface = self._window_surface
+        else:
+            self._canvas_surface = pygame.Surface(self.canvas_size)
+
+        peachy.graphics.set_default_context(self._canvas_surface)
+        peachy.graphics.set_context(self._canvas_surface)
+        self._scale_buffers = None
+        self._dirty_previous = None
+
     def __shutdown(self):
         """Execute shutdown procedure
 
@@ -407,7 +645,8 @@ class Entity(object):
     collision detection.
 
     Attributes:
-        name (str): A unique string used to identify this Entity. 1 per Room.
+        name (str): A unique string used to identify this Entity. 1 per Room,
+            a warning is logged if a name is used twice within a Room.
         group (str): A string used to organize this entity into categories, an
             Entity can be a part of multiple groups. Groups are separated with
             a space.
@@ -419,7 +658,8 @@ class Entity(object):
         solid (bool): Is this entity collidable? If this is set to False
             then this entity is ignored during collision detection checks.
         order (int): Order of entity in Room.entities. Lower order is rendered
-            and updated first.
+            and updated first. Entities with the same order keep the order
+            they were added in.
         container (peachy.Room): A reference to the owner of this entity.
             Must be set before performing any operations involving groups
             (Entity.group).
@@ -429,13 +669,13 @@ class Entity(object):
         """Initialize Entity"""
         self.group = ''
         self.__groups = []
-        self.name = ''
+        self.__name = ''
 
         self.active = True
         self.visible = True
         self.solid = False
 
-        self.order = 0
+        self.__order = 0
 
         self.container = None
 
@@ -447,6 +687,36 @@ class Entity(object):
     def group(self, groups):
         self.__groups = groups.split()
 
+        container = getattr(self, 'container', None)
+        if container is not None:
+            container._index_groups(self)
+
+    @property
+    def name(self):
+        return self.__name
+
+    @name.setter
+    def name(self, name):
+        previous = self.__name
+        self.__name = name
+
+        container = getattr(self, 'container', None)
+        if container is not None:
+            container._index_name(self, previous)
+
+    @property
+    def order(self):
+        return self.__order
+
+    @order.setter
+    def order(self, order):
+        previous = self.__order
+        self.__order = order
+
+        container = getattr(self, 'container', None)
+        if container is not None and order != previous:
+            container._reorder(self, previous)
+
     def destroy(self):
         """Destroy this entity.
 
@@ -488,7 +758,19 @@ class Room(list):
     Attributes:
         world (peachy.World): Containing World.
         sort_required (bool): Does entities list need to be sorted? If True,
-            entities list will be sorted at the end of this cycle.
+            entities list will be sorted at the end of this cycle. Entities are
+            kept in order as they are added or reordered, including through
+            list methods (insert, extend, slice assignment), so this is rarely
+            required.
+        spatial_hash (peachy.collision.SpatialHash): Broadphase used by
+            peachy.collision to narrow down collision queries. None (disabled)
+            by default, see enable_spatial_hash().
+        component_store (peachy.batch.ComponentStore): Array-backed storage
+            for bulk physics on peachy.batch.StoredRect entities. None
+            (disabled) by default, see enable_component_store().
+        collision_map (peachy.collision.TileCollisionMap): Static level
+            geometry included in peachy.collision.collides_solid and
+            sweep_solid. None by default.
     """
 
     def __init__(self, world):
@@ -500,9 +782,55 @@ class Room(list):
         super().__init__()
         self.world = world
         self.sort_required = False
+        self.spatial_hash = None
+        self.component_store = None
+        self.collision_map = None
+
+        self._groups = {}  # group -> {id(entity): entity}
+        self._memberships = {}  # id(entity) -> indexed groups
+        self._names = {}  # name -> {id(entity): entity}
+
+        # Entity.order of every entity, in the same order as self. Used for
+        # ordered insertion without re-sorting.
+        self._order_keys = []
+
+        # id(entity) -> (order, sequence). Sorts the same as self, so indexed
+        # lookups can be returned in Room order.
+        self._positions = {}
+        self._sequence = itertools.count()
+
+        # Adds, removes and reorders requested while iterating are queued until
+        # the iteration completes, see _apply_pending()
+        self._iterating = 0
+        self._pending = []  # (entity, add)
+        self._pending_reorders = {}  # id(entity) -> (entity, previous order)
 
         self.append = self.add
 
+    def __delitem__(self, index):
+        """Remove the entity, or slice of entities, at index. See remove()."""
+        entities = self[index]
+        if not isinstance(index, slice):
+            entities = [entities]
+        for entity in entities:
+            self.remove(entity)
+
+    def __iadd__(self, entities):
+        self.extend(entities)
+        return self
+
+    def __setitem__(self, index, value):
+        """Replace the entity, or slice of entities, at index.
+
+        The replacements are added in order (see add()), rather than placed at
+        index.
+        """
+        del self[index]
+        if isinstance(index, slice):
+            self.extend(value)
+        else:
+            self.add(value)
+
     def enter(self):
         """Called after entering this room."""
         return
@@ -515,7 +843,9 @@ class Room(list):
         """Add an entity to this Stage.
 
         Adds an entity to self.entities and sets entity.container to self.
-        self.sort() will be queued.
+        The entity is inserted after every entity with an equal or lower order.
+        If called during update() or render(), the entity is added once every
+        entity has been updated/rendered.
 
         Args:
             entity (peachy.Entity): Entity to add to this Room.
@@ -524,10 +854,107 @@ class Room(list):
             peachy.Entity: a reference to the entity added to self.entities.
         """
         entity.container = self
-        super().append(entity)
-        self.sort_required = True
+        if self._iterating:
+            self._pending.append((entity, True))
+            return entity
+
+        index = bisect.bisect_right(self._order_keys, entity.order)
+        self._order_keys.insert(index, entity.order)
+        super().insert(index, entity)
+        self._positions[id(entity)] = (entity.order, next(self._sequence))
+        self._memberships[id(entity)] = ()
+        self._index_groups(entity)
+        self._index_name(entity)
+        if self.spatial_hash is not None:
+            self.spatial_hash.insert(entity)
+        if self.component_store is not None:
+            self.component_store.add(entity)
         return entity
 
+    def extend(self, entities):
+        """Add every entity in entities. See add()."""
+        for entity in list(entities):
+            self.add(entity)
+
+    def insert(self, index, entity):
+        """Add an entity to this Room.
+
+        Entities are kept sorted by Entity.order, so index is ignored and
+        entity is inserted as if by add().
+        """
+        self.add(entity)
+
+    def clear(self):
+        """Remove every entity from this Room."""
+        super().clear()
+        del self._order_keys[:]
+        del self._pending[:]
+        self._pending_reorders.clear()
+        self._groups.clear()
+        self._memberships.clear()
+        self._positions.clear()
+        self._names.clear()
+        if self.spatial_hash is not None:
+            self.spatial_hash.clear()
+        if self.component_store is not None:
+            self.component_store.clear()
+
+    def disable_component_store(self):
+        """Move entity geometry out of the component store and detach it."""
+        if self.component_store is not None:
+            self.component_store.clear()
+            self.component_store = None
+
+    def disable_spatial_hash(self):
+        """Stop using a spatial hash for collision queries."""
+        self.spatial_hash = None
+
+    def enable_component_store(self, capacity=256):
+        """Keep the geometry of entities in array-backed storage.
+
+        The x, y, width, height, vx and vy of every peachy.batch.StoredRect in
+        this Room are stored in NumPy arrays, allowing physics to be performed
+        on every entity at once. Requires numpy.
+
+        Note:
+            Entities moved by the store are not re-bucketed in the spatial
+            hash automatically.
+
+        Args:
+            capacity (int, optional): The amount of entities to allocate room
+                for. Grows as required.
+
+        Returns:
+            peachy.batch.ComponentStore: The newly created component store.
+        """
+        import peachy.batch  # Requires numpy, which is optional
+
+        self.disable_component_store()
+        self.component_store = peachy.batch.ComponentStore(capacity)
+        for entity in self:
+            self.component_store.add(entity)
+        return self.component_store
+
+    def enable_spatial_hash(self, cell_size=64):
+        """Use a spatial hash for collision queries against this Room.
+
+        Collision queries in peachy.collision will only survey entities near
+        the shape being tested instead of every entity in this Room. Entities
+        are re-bucketed after their update() is called; entities moved
+        elsewhere must be re-bucketed using self.spatial_hash.update(entity).
+
+        Args:
+            cell_size (int, optional): The size of a single grid cell. Should
+                be roughly the size of the most common entity.
+
+        Returns:
+            peachy.collision.SpatialHash: The newly created spatial hash.
+        """
+        self.spatial_hash = peachy.collision.SpatialHash(cell_size)
+        for entity in self:
+            self.spatial_hash.insert(entity)
+        return self.spatial_hash
+
     def group(self, *groups):
         """Iterate through each entity that is a member of any of the groups.
 
@@ -537,26 +964,27 @@ class Room(list):
         Returns:
             A generator that yields members of the specified groups.
         """
-        for e in self:
-            if e.member_of(*groups):
-                yield e
+        for e in self.get_group(*groups):
+            yield e
 
     def get_group(self, *groups):
         """Returns a list of every entity that is a member of any of the groups.
 
+        Entities are listed in the same order as this Room.
+
         Args:
             *groups(str): Argument list of group names to check for membership.
         """
-        entities = []
-        for e in self:
-            if e.member_of(*groups):
-                entities.append(e)
-        return entities
+        members = {}
+        for group in groups:
+            members.update(self._groups.get(group, {}))
+        positions = self._positions
+        return [members[key] for key in sorted(members, key=positions.get)]
 
     def get_name(self, name):
         """Get entity by name
 
-        Finds the first entity under name in self.entities.
+        Finds the first entity added under name.
 
         Args:
             name (str): The Entity.name to find
@@ -564,24 +992,43 @@ class Room(list):
         Returns:
             peachy.Entity: An entity that has the unique name
         """
-        for e in self:
-            if e.name == name:
-                return e
+        entities = self._names.get(name)
+        if entities:
+            return next(iter(entities.values()))
         return None
 
+    def pop(self, index=-1):
+        """Remove and return the entity at index. See remove()."""
+        entity = self[index]
+        self.remove(entity)
+        return entity
+
     def remove(self, entity):
         """Remove entity from this Room.
 
-        Removes entity from self.entities. Queues sort.
+        Removes entity from self.entities. If called during update() or
+        render(), the entity is removed once every entity has been
+        updated/rendered.
 
         Args:
             entity (peachy.Entity): The entity to remove.
         """
-
-        try:
-            super().remove(entity)
-            self.sort_required = True
-        except ValueError:
+        if self._iterating:
+            self._pending.append((entity, False))
+            return
+
+        index = self._index_of(entity, entity.order)
+        if index is not None:
+            super().__delitem__(index)
+            del self._order_keys[index]
+            del self._positions[id(entity)]
+            self._unindex_groups(entity)
+            self._unindex_name(entity, entity.name)
+            if self.spatial_hash is not None:
+                self.spatial_hash.remove(entity)
+            if self.component_store is not None:
+                self.component_store.remove(entity)
+        else:
             logging.warning('Attempted to remove Entity \{{0}\} \
                    that is not in Room \{{1}\}'.format(entity, self))
             pass  # Do nothing
@@ -590,29 +1037,27 @@ class Room(list):
         """Remove group of entities.
 
         Remove every entity that is a member of the specified group from
-        self.entities. Queues sort.
+        self.entities.
 
         Args:
             group (str): The group to remove
         """
 
-        for entity in list_wrap(self):
-            if entity.member_of(group):
-                self.remove(entity)
+        for entity in self.get_group(group):
+            self.remove(entity)
 
     def remove_name(self, entity_name):
         """ Remove an entity from this Room by name.
 
-        Find entity by name and removes from self.entities. Queues sort.
+        Find entity by name and removes from self.entities.
 
         Args:
             entity_name (str): The unique name of an entity to remove.
         """
 
-        for entity in self:
-            if entity.name == entity_name:
-                self.remove(entity)
-                break
+        entity = self.get_name(entity_name)
+        if entity is not None:
+            self.remove(entity)
 
     def render(self):
         """Render all visible entities.
@@ -620,9 +1065,14 @@ class Room(list):
         Call Entity.render() on all entities inside self.entities that have
         Entity.visible set to True.
         """
-        for entity in list_wrap(self):
-            if entity.visible:
-                entity.render()
+        self._iterating += 1
+        try:
+            for entity in self:
+                if entity.visible:
+                    entity.render()
+        finally:
+            self._iterating -= 1
+        self._apply_pending()
 
     def update(self):
         """Update all active entities.
@@ -630,15 +1080,128 @@ class Room(list):
         Call Entity.update() on all entities inside self.entities that have
         Entity.active set to True.
 
-        Sorts all entities after updating if sort has been queued.
+        Sorts all entities after updating if sort_required is set.
         """
-        for entity in list_wrap(self):
-            if entity.active:
-                entity.update()
+        spatial_hash = self.spatial_hash
+        self._iterating += 1
+        try:
+            for entity in self:
+                if entity.active:
+                    entity.update()
+                    if spatial_hash is not None:
+                        spatial_hash.update(entity)
+        finally:
+            self._iterating -= 1
+        self._apply_pending()
 
         if self.sort_required:
             self.sort()
-            self.sort_required = False
+
+    def _apply_pending(self):
+        """Perform the adds, removes and reorders queued during iteration."""
+        if self._iterating:
+            return
+
+        if self._pending_reorders:
+            reorders = self._pending_reorders
+            self._pending_reorders = {}
+            for entity, previous in reorders.values():
+                if entity.order != previous:
+                    self._reorder(entity, previous)
+
+        if not self._pending:
+            return
+
+        pending = self._pending
+        self._pending = []
+        for entity, add in pending:
+            if add:
+                self.add(entity)
+            else:
+                self.remove(entity)
+
+    def _index_of(self, entity, order):
+        """Find the index of entity, using its order to narrow the search."""
+        low = bisect.bisect_left(self._order_keys, order)
+        high = bisect.bisect_right(self._order_keys, order, low)
+        for index in range(low, high):
+            if self[index] is entity:
+                return index
+
+        # Fall back to a full search in case the list was modified directly
+        for index, member in enumerate(self):
+            if member is entity:
+                return index
+        return None
+
+    def _reorder(self, entity, previous):
+        """Move entity to its new position after entity.order has changed."""
+        key = id(entity)
+        if key not in self._memberships:
+            return  # Not a member of this Room
+
+        if self._iterating:
+            self._pending_reorders.setdefault(key, (entity, previous))
+            return
+
+        index = self._index_of(entity, previous)
+        if index is None:
+            return
+        super().__delitem__(index)
+        del self._order_keys[index]
+
+        index = bisect.bisect_right(self._order_keys, entity.order)
+        self._order_keys.insert(index, entity.order)
+        super().insert(index, entity)
+        self._positions[key] = (entity.order, next(self._sequence))
+
+    def _index_groups(self, entity):
+        """Update the group index after entity.group has changed."""
+        key = id(entity)
+        if key not in self._memberships:
+            return  # Not a member of this Room
+        self._unindex_groups(entity)
+
+        groups = tuple(entity.group)
+        for group in groups:
+            self._groups.setdefault(group, {})[key] = entity
+        self._memberships[key] = groups
+
+    def _index_name(self, entity, previous=''):
+        """Update the name index after entity.name has changed."""
+        key = id(entity)
+        if key not in self._memberships:
+            return  # Not a member of this Room
+
+        self._unindex_name(entity, previous)
+
+        name = entity.name
+        if name:
+            entities = self._names.setdefault(name, {})
+            if entities and key not in entities:
+                logging.warning('Duplicate Entity name in Room: ' + name)
+            entities[key] = entity
+
+    def _unindex_name(self, entity, name):
+        entities = self._names.get(name)
+        if entities is not None:
+            entities.pop(id(entity), None)
+            if not entities:
+                del self._names[name]
+
+    def _unindex_groups(self, entity):
+        key = id(entity)
+        for group in self._memberships.pop(key, ()):
+            members = self._groups.get(group)
+            if members is not None:
+                members.pop(key, None)
+                if not members:
+                    del self._groups[group]
+
+    def reverse(self):
+        """Not supported, entities are kept sorted by Entity.order."""
+        logging.warning('Attempted to reverse Room, entities are kept sorted '
+                        'by Entity.order')
 
     def sort(self):
         """Sort entities.
@@ -647,6 +1210,11 @@ class Room(list):
         automatically inside self.update() if sort_required is True.
         """
         super().sort(key=lambda entity: entity.order)
+        self._order_keys = [entity.order for entity in self]
+        for entity in self:
+            self._positions[id(entity)] = \
+                (entity.order, next(self._sequence))
+        self.sort_required = False
 
 
 class World(object):
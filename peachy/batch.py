@@ -0,0 +1,367 @@
+"""Peachy batch operations
+
+Vectorized variants of the pairwise functions in peachy.collision, and
+array-backed entity storage for bulk physics (see ComponentStore). Shapes are
+stored in structured NumPy arrays (see RECT, CIRCLE, POINT and LINE) so that
+thousands of collision tests can be resolved in a single call. Useful for
+particle and bullet systems.
+
+Every collision function broadcasts its arguments: either argument may be a
+single shape (a peachy.geo shape or tuple) or an array of shapes. The result is
+a boolean mask in the broadcast shape. Use pairs() to test every shape in one
+array against every shape in another.
+
+Example:
+    >>> bullets = peachy.batch.to_array(bullet_entities, peachy.batch.RECT)
+    >>> hits = peachy.batch.rect_rect(player, bullets)
+    >>> a, b = peachy.batch.pairs(peachy.batch.circle_circle, ships, rocks)
+    >>> store = room.enable_component_store()
+    >>> store.integrate(ay=GRAVITY)
+
+Note:
+    Requires numpy, which is not installed with peachy by default.
+"""
+
+import numpy
+
+import peachy.geo
+
+RECT = numpy.dtype([('x', 'f8'), ('y', 'f8'),
+                    ('width', 'f8'), ('height', 'f8')])
+CIRCLE = numpy.dtype([('x', 'f8'), ('y', 'f8'), ('radius', 'f8')])
+POINT = numpy.dtype([('x', 'f8'), ('y', 'f8')])
+LINE = numpy.dtype([('x1', 'f8'), ('y1', 'f8'), ('x2', 'f8'), ('y2', 'f8')])
+
+"""The maximum amount of tests performed at once by pairs()."""
+PAIRS_CHUNK_SIZE = 1 << 20
+
+
+def to_array(shapes, dtype):
+    """Convert shapes into a structured array.
+
+    Args:
+        shapes (list): Shapes or tuples to convert. Each must unpack into the
+            fields of dtype (ie. peachy.geo.Rect into RECT).
+        dtype (numpy.dtype): One of RECT, CIRCLE, POINT or LINE.
+
+    Returns:
+        numpy.ndarray: A structured array with one element per shape.
+    """
+    return numpy.array([tuple(shape) for shape in shapes], dtype=dtype)
+
+
+def pairs(collision_function, shapes_a, shapes_b=None):
+    """Test every shape in shapes_a against every shape in shapes_b.
+
+    Args:
+        collision_function (func): Any collision function in this module.
+        shapes_a (numpy.ndarray): The first set of shapes.
+        shapes_b (numpy.ndarray, optional): The second set of shapes. If left
+            unspecified, shapes_a is tested against itself and every colliding
+            pair is only reported once (shapes do not collide with themselves).
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray]: Indices into shapes_a and
+            shapes_b, respectively, of every colliding pair.
+    """
+    unique = shapes_b is None
+    if unique:
+        shapes_b = shapes_a
+
+    chunk = max(1, PAIRS_CHUNK_SIZE // max(1, len(shapes_b)))
+    found_a = []
+    found_b = []
+
+    for start in range(0, len(shapes_a), chunk):
+        block = shapes_a[start:start + chunk]
+        mask = collision_function(block[:, None], shapes_b[None, :])
+        if unique:
+            mask &= numpy.arange(len(shapes_b))[None, :] > \
+                numpy.arange(start, start + len(block))[:, None]
+        index_a, index_b = numpy.nonzero(mask)
+        found_a.append(index_a + start)
+        found_b.append(index_b)
+
+    if not found_a:
+        empty = numpy.empty(0, dtype=numpy.intp)
+        return empty, empty
+    return numpy.concatenate(found_a), numpy.concatenate(found_b)
+
+
+def _fields(shape, dtype):
+    if isinstance(shape, numpy.ndarray) and shape.dtype.names:
+        return tuple(shape[name] for name in dtype.names)
+    return tuple(numpy.float64(value) for value in shape)
+
+
+def circle_circle(circles_a, circles_b):
+    """Vectorized peachy.collision.circle_circle."""
+    ax, ay, ar = _fields(circles_a, CIRCLE)
+    bx, by, br = _fields(circles_b, CIRCLE)
+
+    dx = (ax + ar) - (bx + br)
+    dy = (ay + ar) - (by + br)
+
+    return dx * dx + dy * dy <= (ar + br)**2
+
+
+def circle_point(circles, points):
+    """Vectorized peachy.collision.circle_point."""
+    cx, cy, cr = _fields(circles, CIRCLE)
+    px, py = _fields(points, POINT)
+
+    dx = (cx + cr) - px
+    dy = (cy + cr) - py
+
+    return dx * dx + dy * dy <= cr * cr
+
+
+def line_line(lines_a, lines_b):
+    """Vectorized peachy.collision.line_line."""
+    a_x1, a_y1, a_x2, a_y2 = _fields(lines_a, LINE)
+    b_x1, b_y1, b_x2, b_y2 = _fields(lines_b, LINE)
+
+    denominator = ((b_y2 - b_y1) * (a_x2 - a_x1)) - \
+                  ((b_x2 - b_x1) * (a_y2 - a_y1))
+
+    ua_numerator = ((b_x2 - b_x1) * (a_y1 - b_y1)) - \
+                   ((b_y2 - b_y1) * (a_x1 - b_x1))
+    ub_numerator = ((a_x2 - a_x1) * (a_y1 - b_y1)) - \
+                   ((a_y2 - a_y1) * (a_x1 - b_x1))
+
+    parallel = denominator == 0
+    denominator = numpy.where(parallel, 1, denominator)
+    ua = ua_numerator / denominator
+    ub = ub_numerator / denominator
+
+    return ~parallel & (ua >= 0) & (ua <= 1) & (ub >= 0) & (ub <= 1)
+
+
+def rect_circle(rects, circles):
+    """Vectorized peachy.collision.rect_circle."""
+    rx, ry, rw, rh = _fields(rects, RECT)
+    cx, cy, radius = _fields(circles, CIRCLE)
+
+    half_width = rw / 2
+    half_height = rh / 2
+
+    dist_x = numpy.abs((cx + radius) - (rx + half_width))
+    dist_y = numpy.abs((cy + radius) - (ry + half_height))
+
+    outside = (dist_x > half_width + radius) | (dist_y > half_height + radius)
+    inside = (dist_x <= half_width) | (dist_y <= half_height)
+    corner = (dist_x - half_width)**2 + (dist_y - half_height)**2 <= radius**2
+
+    return ~outside & (inside | corner)
+
+
+def rect_point(rects, points):
+    """Vectorized peachy.collision.rect_point."""
+    rx, ry, rw, rh = _fields(rects, RECT)
+    px, py = _fields(points, POINT)
+
+    return (rx <= px) & (px <= rx + rw) & (ry <= py) & (py <= ry + rh)
+
+
+def rect_rect(rects_a, rects_b):
+    """Vectorized peachy.collision.rect_rect."""
+    ax, ay, aw, ah = _fields(rects_a, RECT)
+    bx, by, bw, bh = _fields(rects_b, RECT)
+
+    return (ax < bx + bw) & (ax + aw > bx) & (ay < by + bh) & (ay + ah > by)
+
+
+class ComponentStore(object):
+    """Array-backed storage for the geometry and velocity of many entities.
+
+    Stores x, y, width, height, vx and vy of every StoredRect added in NumPy
+    columns, so that physics can be performed on every entity at once
+    (integrate, clamp) instead of one Entity.update() at a time. Attach to a
+    Room using Room.enable_component_store().
+
+    Attributes:
+        entities (list[StoredRect]): Stored entities, in column order.
+    """
+
+    COLUMNS = ('x', 'y', 'width', 'height', 'vx', 'vy')
+
+    def __init__(self, capacity=256):
+        self.entities = []
+        self._columns = dict((name, numpy.zeros(capacity))
+                             for name in ComponentStore.COLUMNS)
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __getattr__(self, name):
+        # Expose each column (ie. store.x) as a view of the stored entities
+        if name in ComponentStore.COLUMNS:
+            return self._columns[name][:len(self.entities)]
+        raise AttributeError(name)
+
+    def add(self, entity):
+        """Move the geometry and velocity of entity into this store.
+
+        Args:
+            entity (StoredRect): The entity to store. Other objects are
+                ignored.
+
+        Returns:
+            int: The column index of entity, or None if it was not stored.
+        """
+        if not isinstance(entity, StoredRect) or entity._store is self:
+            return None
+        if entity._store is not None:
+            entity._store.remove(entity)
+
+        index = len(self.entities)
+        if index == len(self._columns['x']):
+            for name, column in self._columns.items():
+                self._columns[name] = numpy.concatenate(
+                    (column, numpy.zeros(len(column))))
+
+        for name in ComponentStore.COLUMNS:
+            self._columns[name][index] = getattr(entity, name)
+        self.entities.append(entity)
+        entity._store = self
+        entity._store_index = index
+        return index
+
+    def clamp(self, left, top, right, bottom, restitution=0):
+        """Keep every stored entity inside of an area.
+
+        Args:
+            left (int): The minimum x-coordinate.
+            top (int): The minimum y-coordinate.
+            right (int): The maximum x-coordinate of an entity's right side.
+            bottom (int): The maximum y-coordinate of an entity's bottom side.
+            restitution (float, optional): Velocity kept, and reversed, along
+                the axis an entity was clamped on. 0 stops entities, 1 bounces
+                them off of the edges.
+        """
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        max_x = right - self.width
+        max_y = bottom - self.height
+
+        clamped = (x < left) | (x > max_x)
+        numpy.clip(x, left, max_x, out=x)
+        vx[clamped] *= -restitution
+
+        clamped = (y < top) | (y > max_y)
+        numpy.clip(y, top, max_y, out=y)
+        vy[clamped] *= -restitution
+
+    def clear(self):
+        """Remove every entity from this store."""
+        for entity in list(self.entities):
+            self.remove(entity)
+
+    def integrate(self, dt=1, ax=0, ay=0):
+        """Apply acceleration and velocity to every stored entity.
+
+        Args:
+            dt (float, optional): The timestep.
+            ax (float, optional): Acceleration along the x-axis.
+            ay (float, optional): Acceleration along the y-axis.
+        """
+        vx, vy = self.vx, self.vy
+        if ax:
+            vx += ax * dt
+        if ay:
+            vy += ay * dt
+        self.x[:] += vx * dt
+        self.y[:] += vy * dt
+
+    def remove(self, entity):
+        """Move the geometry and velocity of entity back into the entity."""
+        if getattr(entity, '_store', None) is not self:
+            return
+
+        index = entity._store_index
+        values = [self._columns[name][index]
+                  for name in ComponentStore.COLUMNS]
+        entity._store = None
+        entity._store_index = -1
+        for name, value in zip(ComponentStore.COLUMNS, values):
+            setattr(entity, name, float(value))
+
+        # Fill the gap with the last entity
+        last = self.entities.pop()
+        if last is not entity:
+            self.entities[index] = last
+            last._store_index = index
+            for column in self._columns.values():
+                column[index] = column[len(self.entities)]
+
+    def to_rects(self):
+        """Get the geometry of every stored entity as a RECT array."""
+        rects = numpy.empty(len(self.entities), dtype=RECT)
+        for name in RECT.names:
+            rects[name] = getattr(self, name)
+        return rects
+
+
+def _stored_column(name):
+    slot = getattr(peachy.geo.Rect, name, None)
+
+    def get(self):
+        store = self._store
+        if store is None:
+            if slot is None:
+                return getattr(self, '_' + name)
+            return slot.__get__(self)
+        return store._columns[name][self._store_index].item()
+
+    def set(self, value):
+        store = self._store
+        if store is None:
+            if slot is None:
+                setattr(self, '_' + name, value)
+            else:
+                slot.__set__(self, value)
+        else:
+            store._columns[name][self._store_index] = value
+
+    return property(get, set)
+
+
+class StoredRect(peachy.geo.Rect):
+    """Rect that can be kept inside of a ComponentStore.
+
+    Behaves like a Rect with a velocity (vx, vy). While stored, attribute
+    access reads and writes the store's columns.
+
+    Example:
+        >>> class Particle(peachy.Entity, peachy.batch.StoredRect):
+        >>>     def __init__(self, x, y):
+        >>>         peachy.Entity.__init__(self)
+        >>>         peachy.batch.StoredRect.__init__(self, x, y, 2, 2)
+    """
+    __slots__ = ('_store', '_store_index', '_vx', '_vy')
+
+    def __init__(self, x, y, width=None, height=None, vx=0, vy=0):
+        self._store = None
+        self._store_index = -1
+        super().__init__(x, y, width, height)
+        self.vx = vx
+        self.vy = vy
+
+    def __copy__(self):
+        # Copies (ie. at_point() probes) are detached from the store, so that
+        # moving them does not move the original.
+        cls = self.__class__
+        copied = cls.__new__(cls)
+        if hasattr(self, '__dict__'):
+            copied.__dict__.update(self.__dict__)
+        copied._store = None
+        copied._store_index = -1
+        for name in ComponentStore.COLUMNS:
+            setattr(copied, name, getattr(self, name))
+        return copied
+
+    x = _stored_column('x')
+    y = _stored_column('y')
+    width = _stored_column('width')
+    height = _stored_column('height')
+    vx = _stored_column('vx')
+    vy = _stored_column('vy')
@@ -1,4 +1,7 @@
-from peachy.geo import ShapeEnum
+import logging
+import math
+
+from peachy.geo import Circle, Rect, ShapeEnum
 
 # Collision functions are alphabetical but prioritze rectangles because
 # they are most common
@@ -11,6 +14,18 @@ def is_between(x, a, b):
     return min(a, b) <= x <= max(a, b)
 
 
+def get_bounds(shape):
+    """Get the axis-aligned bounding box of a shape.
+
+    Args:
+        shape (peachy.geo.Shape): Any shape with a shapeid.
+
+    Returns:
+        tuple[x, y, width, height]: The bounding box of the shape.
+    """
+    return _bounds_functions[shape.shapeid](shape)
+
+
 def rect_to_vector_segments(rect):
     x, y, width, height = rect
     top = (x, y, width, 0)
@@ -36,65 +51,414 @@ class CollisionResult(object):
         self.is_first = first
 
 
+class SweepResult(object):
+    """SweepResult is returned from sweep functions. It contains information on
+    the first collision along a movement.
+
+    Attributes:
+        time (float): How far along the movement, between 0 and 1, the
+            collision occurs. Move by (dx * time, dy * time) to make contact.
+        normal (tuple[int, int]): The contact normal, pointing away from the
+            shape that was hit. (0, 0) if the shapes were already overlapping.
+        shape (object): The shape that was hit.
+    """
+    def __init__(self, time, normal, shape):
+        self.time = time
+        self.normal = normal
+        self.shape = shape
+
+
+class SpatialHash(object):
+    """Uniform grid broadphase for collision queries.
+
+    Shapes are bucketed into square cells by their bounding box. Queries only
+    survey the shapes inside the cells overlapping the query area, rather than
+    every shape in a Room. Owned by peachy.Room, see Room.enable_spatial_hash.
+
+    Shapes are tracked by identity, so shapes that move must be re-bucketed
+    using update(). Room does this automatically after each Entity.update().
+
+    Attributes:
+        cell_size (int): The width and height of a single cell.
+        cells (dict): Maps cell coordinates (cx, cy) to a dict of the shapes
+            (keyed by id) that overlap that cell.
+    """
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self._ranges = {}
+
+    def __contains__(self, shape):
+        return id(shape) in self._ranges
+
+    def __len__(self):
+        return len(self._ranges)
+
+    def clear(self):
+        """Remove every shape from the grid."""
+        self.cells.clear()
+        self._ranges.clear()
+
+    def insert(self, shape):
+        """Add a shape to the grid.
+
+        Objects without a shapeid (ie. a plain peachy.Entity) are ignored.
+        """
+        try:
+            cell_range = self._cell_range(*get_bounds(shape))
+        except (AttributeError, KeyError):
+            return
+        self._ranges[id(shape)] = cell_range
+        self._add_to_cells(shape, cell_range)
+
+    def query(self, x, y, width, height):
+        """Get every shape with a bounding box overlapping an area.
+
+        Args:
+            x (int): The x-coordinate of the area.
+            y (int): The y-coordinate of the area.
+            width (int): The width of the area.
+            height (int): The height of the area.
+
+        Returns:
+            list[peachy.geo.Shape]: Every candidate shape within the area.
+                These shapes are not guaranteed to be colliding with the area.
+        """
+        x0, y0, x1, y1 = self._cell_range(x, y, width, height)
+        cells = self.cells
+
+        if x0 == x1 and y0 == y1:
+            cell = cells.get((x0, y0))
+            return list(cell.values()) if cell else []
+
+        found = {}
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        return list(found.values())
+
+    def remove(self, shape):
+        """Remove a shape from the grid."""
+        cell_range = self._ranges.pop(id(shape), None)
+        if cell_range is not None:
+            self._remove_from_cells(shape, cell_range)
+
+    def update(self, shape):
+        """Re-bucket a shape after it has moved or changed size.
+
+        Shapes that have not left their current cells are not touched.
+        """
+        key = id(shape)
+        previous = self._ranges.get(key)
+        if previous is None:
+            return
+
+        cell_range = self._cell_range(*get_bounds(shape))
+        if cell_range != previous:
+            self._remove_from_cells(shape, previous)
+            self._add_to_cells(shape, cell_range)
+            self._ranges[key] = cell_range
+
+    def _add_to_cells(self, shape, cell_range):
+        x0, y0, x1, y1 = cell_range
+        key = id(shape)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is None:
+                    cell = cells[(cx, cy)] = {}
+                cell[key] = shape
+
+    def _cell_range(self, x, y, width, height):
+        size = self.cell_size
+        return (int(x // size), int(y // size),
+                int((x + width) // size), int((y + height) // size))
+
+    def _remove_from_cells(self, shape, cell_range):
+        x0, y0, x1, y1 = cell_range
+        key = id(shape)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                cell = cells.get((cx, cy))
+                if cell is not None:
+                    cell.pop(key, None)
+                    if not cell:
+                        del cells[(cx, cy)]
+
+
+class TileCollisionMap(object):
+    """Solid level geometry stored as a grid of tiles.
+
+    Queries are answered using tile index arithmetic, so only the tiles covered
+    by a shape are visited regardless of the size of the map. Assign to
+    Room.collision_map to include it in collides_solid() and sweep_solid(),
+    keeping static geometry out of the entity list.
+
+    Example:
+        >>> layer = stage.get_layer_by_name('solid')
+        >>> room.collision_map = TileCollisionMap.from_layer(stage, layer)
+
+    Attributes:
+        tiles (list[list[int]]): Tiles indexed by [y][x]. Any tile that is not
+            0 is solid.
+        tile_width (int): The width of a single tile.
+        tile_height (int): The height of a single tile.
+        columns (int): The width of the map in tiles.
+        rows (int): The height of the map in tiles.
+    """
+
+    def __init__(self, tiles, tile_width, tile_height):
+        self.tiles = tiles
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.rows = len(tiles)
+        self.columns = len(tiles[0]) if tiles else 0
+
+    @classmethod
+    def from_layer(cls, stage, layer):
+        """Create a map from a stage layer. Every tile in the layer is solid.
+
+        Args:
+            stage (pytmx.TiledMap, peachy.stage.StageData): The stage layer
+                belongs to.
+            layer (pytmx.TiledTileLayer, peachy.stage.StageData.StageLayer):
+                The layer containing solid tiles.
+        """
+        try:
+            tile_width, tile_height = stage.tilewidth, stage.tileheight
+        except AttributeError:
+            tile_width, tile_height = stage.tile_width, stage.tile_height
+
+        data = getattr(layer, 'data', None)
+        if data is not None:
+            tiles = [[1 if gid else 0 for gid in row] for row in data]
+        else:
+            tiles = [[0] * stage.width for _ in range(stage.height)]
+            for tile in layer.tiles:
+                if tile.gid:
+                    tiles[tile.y][tile.x] = 1
+        return cls(tiles, tile_width, tile_height)
+
+    def collides(self, shape, dx=0, dy=0):
+        """Get every solid tile colliding with a shape.
+
+        Args:
+            shape (peachy.geo.Shape): The shape to test.
+            dx (int, optional): Test shape offset along the x-axis.
+            dy (int, optional): Test shape offset along the y-axis.
+
+        Returns:
+            list[peachy.collision.CollisionResult]: Every tile colliding with
+                shape. CollisionResult.shape is a Rect covering the tile.
+        """
+        collisions = []
+        probe = get_probe(shape, dx, dy)
+        x, y, width, height = get_bounds(shape)
+
+        for tile in self._solid_tiles(x + dx, y + dy, width, height, True):
+            colliding, f, swap = _collides(shape, probe, tile)
+            if colliding:
+                collisions.append(CollisionResult(f, tile, swap))
+        return collisions
+
+    def collides_line(self, x1, y1, x2, y2):
+        """Check if a line segment touches any solid tile."""
+        line = (x1, y1, x2, y2)
+        x = min(x1, x2)
+        y = min(y1, y2)
+        for tile in self._solid_tiles(x, y, max(x1, x2) - x, max(y1, y2) - y,
+                                      True):
+            if rect_line(tile, line):
+                return True
+        return False
+
+    def collides_point(self, x, y):
+        """Check if a point lies inside of, or on the edge of, a solid tile."""
+        for _ in self._solid_tiles(x, y, 0, 0, True):
+            return True
+        return False
+
+    def collides_rect(self, x, y, width, height):
+        """Check if a rectangle overlaps any solid tile. Touching edges do not
+        collide.
+        """
+        for _ in self._solid_tiles(x, y, width, height, False):
+            return True
+        return False
+
+    def get_tile(self, tile_x, tile_y):
+        """Get the value of a tile, or 0 if outside of the map."""
+        if 0 <= tile_x < self.columns and 0 <= tile_y < self.rows:
+            return self.tiles[tile_y][tile_x]
+        return 0
+
+    def set_tile(self, tile_x, tile_y, value):
+        """Set the value of a tile. Any value that is not 0 is solid.
+
+        Tiles outside of the map are ignored.
+        """
+        if 0 <= tile_x < self.columns and 0 <= tile_y < self.rows:
+            self.tiles[tile_y][tile_x] = value
+        else:
+            logging.warning('Attempted to set tile ({0}, {1}) outside of '
+                            'TileCollisionMap'.format(tile_x, tile_y))
+
+    def sweep(self, shape, dx, dy):
+        """Find the first solid tile a moving shape collides with.
+
+        See sweep_tiles().
+        """
+        return sweep_tiles(shape, dx, dy, self.tiles, self.tile_width,
+                           self.tile_height)
+
+    def _solid_tiles(self, x, y, width, height, touching):
+        """Yield a Rect for every solid tile overlapping an area. If touching,
+        tiles that only share an edge with the area are included.
+        """
+        tile_width = self.tile_width
+        tile_height = self.tile_height
+
+        left = int(x // tile_width)
+        top = int(y // tile_height)
+        if touching:
+            right = int((x + width) // tile_width)
+            bottom = int((y + height) // tile_height)
+            if x % tile_width == 0:
+                left -= 1
+            if y % tile_height == 0:
+                top -= 1
+        else:
+            right = int(math.ceil((x + width) / tile_width)) - 1
+            bottom = int(math.ceil((y + height) / tile_height)) - 1
+
+        tiles = self.tiles
+        for tile_y in range(max(top, 0), min(bottom, self.rows - 1) + 1):
+            row = tiles[tile_y]
+            for tile_x in range(max(left, 0),
+                                min(right, self.columns - 1) + 1):
+                if row[tile_x]:
+                    yield Rect(tile_x * tile_width, tile_y * tile_height,
+                               tile_width, tile_height)
+
+
+def get_candidates(container, shape, dx=0, dy=0):
+    """Get the shapes in a container that shape could be colliding with.
+
+    Uses the container's spatial hash, if one is enabled, otherwise every
+    shape inside the container is a candidate.
+
+    Args:
+        container (peachy.Room): The room the shapes are held in.
+        shape (peachy.geo.Shape): The shape to find candidates for.
+        dx (int, optional): Offset shape along the x-axis by this amount.
+        dy (int, optional): Offset shape along the y-axis by this amount.
+    """
+    spatial_hash = getattr(container, 'spatial_hash', None)
+    if spatial_hash is None:
+        return container
+    x, y, width, height = get_bounds(shape)
+    return spatial_hash.query(x + dx, y + dy, width, height)
+
+
+def get_probe(shape, dx, dy):
+    """Get a shape displaced by (dx, dy) without copying it.
+
+    Cheaper alternative to Shape.at_point(). Every collision function accepts
+    tuples, so the displaced shape is represented as a tuple.
+
+    Args:
+        shape (peachy.geo.Shape): The shape to displace.
+        dx (int): Offset along the x-axis.
+        dy (int): Offset along the y-axis.
+
+    Returns:
+        tuple: The displaced shape, or shape itself if there is no offset.
+    """
+    if not dx and not dy:
+        return shape
+
+    offset_function = _offset_functions.get(shape.shapeid)
+    if offset_function is None:
+        return shape.at_point(shape.x + dx, shape.y + dy)
+    return offset_function(shape, dx, dy)
+
+
 def get_collision_function(shape_a, shape_b):
-    collision_function = None
-    swap = False
-
-    if shape_a.shapeid > shape_b.shapeid:
-        shape_a, shape_b = shape_b, shape_a
-        swap = True
-
-    if shape_a.shapeid == ShapeEnum.RECT:
-        if shape_b.shapeid == ShapeEnum.RECT:
-            collision_function = rect_rect
-        elif shape_b.shapeid == ShapeEnum.CIRCLE:
-            collision_function = rect_circle
-        elif shape_b.shapeid == ShapeEnum.LINE:
-            collision_function = rect_line
-        elif shape_b.shapeid == ShapeEnum.POINT:
-            collision_function = rect_point
-    elif shape_a.shapeid == ShapeEnum.CIRCLE:
-        if shape_b.shapeid == ShapeEnum.RECT:
-            collision_function = rect_circle
-        elif shape_b.shapeid == ShapeEnum.CIRCLE:
-            collision_function = circle_circle
-        elif shape_b.shapeid == ShapeEnum.LINE:
-            collision_function = circle_line
-        elif shape_b.shapeid == ShapeEnum.POINT:
-            collision_function = circle_point
-    elif shape_a.shapeid == ShapeEnum.LINE:
-        if shape_b.shapeid == ShapeEnum.RECT:
-            collision_function = rect_line
-        elif shape_b.shapeid == ShapeEnum.CIRCLE:
-            collision_function = circle_line
-        if shape_b.shapeid == ShapeEnum.LINE:
-            collision_function = line_line
-        elif shape_b.shapeid == ShapeEnum.POINT:
-            collision_function = line_point
-    elif shape_a.shapeid == ShapeEnum.POINT:
-        if shape_b.shapeid == ShapeEnum.RECT:
-            collision_function = rect_point
-        elif shape_b.shapeid == ShapeEnum.CIRCLE:
-            collision_function = circle_point
-        elif shape_b.shapeid == ShapeEnum.POINT:
-            collision_function = point_point
-        elif shape_b.shapeid == ShapeEnum.LINE:
-            collision_function = line_point
-
-    # TODO POLYGON_ID
-
-    return collision_function, swap
-
-
-def collides_first(container, main_shape):
-    for shape in container:
-        collision, f, swap = collides_unknown(main_shape, shape)
+    """Get the function used to detect collision between two shapes.
+
+    Args:
+        shape_a (peachy.geo.Shape): The first shape.
+        shape_b (peachy.geo.Shape): The second shape.
+
+    Returns:
+        tuple[func, bool]: The collision function, or None if no function is
+            registered for these shapes, and whether shape_a and shape_b must
+            be swapped when calling it.
+    """
+    return _collision_table.get((shape_a.shapeid, shape_b.shapeid),
+                                _NO_COLLISION_FUNCTION)
+
+
+def register_collision_function(shapeid_a, shapeid_b, collision_function):
+    """Register the function used to detect collision between two shapes.
+
+    Use to add collision detection for custom shapes. Shapes are identified by
+    their shapeid, custom shapes should use an id outside of ShapeEnum.
+
+    Args:
+        shapeid_a (int): The shapeid of the first argument of the function.
+        shapeid_b (int): The shapeid of the second argument of the function.
+        collision_function (func): A function that takes a shape of shapeid_a
+            and a shape of shapeid_b, in that order, and returns True if they
+            are colliding.
+    """
+    _collision_table[(shapeid_a, shapeid_b)] = (collision_function, False)
+    if shapeid_a != shapeid_b:
+        _collision_table[(shapeid_b, shapeid_a)] = (collision_function, True)
+
+
+def unregister_collision_function(shapeid_a, shapeid_b):
+    """Remove the function used to detect collision between two shapes.
+
+    Args:
+        shapeid_a (int): The shapeid of the first shape.
+        shapeid_b (int): The shapeid of the second shape.
+    """
+    _collision_table.pop((shapeid_a, shapeid_b), None)
+    _collision_table.pop((shapeid_b, shapeid_a), None)
+
+
+def register_bounds_function(shapeid, bounds_function):
+    """Register the function used to get the bounding box of a shape.
+
+    Required for custom shapes to be tracked by SpatialHash.
+
+    Args:
+        shapeid (int): The shapeid of the shape.
+        bounds_function (func): A function that takes a shape and returns its
+            bounding box as a tuple (x, y, width, height).
+    """
+    _bounds_functions[shapeid] = bounds_function
+
+
+def collides_first(container, main_shape, dx=0, dy=0):
+    probe = get_probe(main_shape, dx, dy)
+    for shape in get_candidates(container, main_shape, dx, dy):
+        if shape is main_shape:
+            continue
+        collision, f, swap = _collides(main_shape, probe, shape)
         if collision:
             return CollisionResult(f, shape, swap)
     return False
 
 
-def collides_group(container, group, shape, collision_function=None):
+def collides_group(container, group, shape, collision_function=None,
+                   dx=0, dy=0):
     """Check if a shape is colliding with a group of shapes.
 
     Check if self is colliding with any entity that is a member of the
@@ -102,8 +466,8 @@ def collides_group(container, group, shape, collision_function=None):
 
     Args:
         group (str): The name of the group to survey.
-        x (int, optional): Temporary replacement x coordinate for self.
-        y (int, optional): Temporary replacement y coordinate for self.
+        dx (int, optional): Test shape offset along the x-axis by this amount.
+        dy (int, optional): Test shape offset along the y-axis by this amount.
 
     Returns:
         list[peachy.collision.CollisionResult]: A list of CollisionResults
@@ -115,31 +479,26 @@ def collides_group(container, group, shape, collision_function=None):
     """
 
     collisions = []
-    shapes = container.group(group)
-
-    collision_type = None
-    collision = None
-    swap = False
+    if getattr(container, 'spatial_hash', None) is None:
+        shapes = container.group(group)
+    else:
+        shapes = (test for test in get_candidates(container, shape, dx, dy)
+                  if test.member_of(group))
 
+    probe = get_probe(shape, dx, dy)
     for test in shapes:
         if shape is test:
             continue
 
-        if collision_type != test.shapeid:
-            collision, swap = get_collision_function(shape, test)
-
-        if not swap:
-            a, b = shape, test
-        else:
-            a, b = test, shape
-
-        if collision(a, b):
+        collided, collision, swap = _collides(shape, probe, test)
+        if collided:
             collisions.append(CollisionResult(collision, test, swap))
 
     return collisions
 
 
-def collides_groups(container, groups, main_shape, collision_function=None):
+def collides_groups(container, groups, main_shape, collision_function=None,
+                    dx=0, dy=0):
     """Check if colliding with groups.
 
     Check if a shape is colliding with any shape that is a member of any
@@ -152,44 +511,53 @@ def collides_groups(container, groups, main_shape, collision_function=None):
         collision_function (function, optional): A function to use for
             collision detection. Can be any of the functions in
             peachy.collisions or a custom function. Shape must be compatible.
+        dx (int, optional): Test main_shape offset along the x-axis by this
+            amount.
+        dy (int, optional): Test main_shape offset along the y-axis by this
+            amount.
 
     Returns:
-        list[peachy.Entity]: Every entity colliding with main_shape that is a
-            member of any of the specified groups.
+        list[peachy.collision.CollisionResult]: A CollisionResult for every
+            entity colliding with main_shape that is a member of any of the
+            specified groups.
     """
 
-    # TODO fix this abomination
-
     collisions = []
-    shapes = container.get_group(*groups)
-    if len(shapes) > 0:
+    probe = get_probe(main_shape, dx, dy)
+    for test in container.get_group(*groups):
+        if test is main_shape:
+            continue
+
         if collision_function is None:
-            collision = get_collision_function(main_shape, shapes[0])
+            collided, collision, swap = _collides(main_shape, probe, test)
         else:
-            collision = collision_function
+            collided = collision_function(probe, test)
+            collision, swap = collision_function, False
 
-        for test in shapes:
-            if collision(main_shape, test):
-                collisions.append(CollisionResult(collision, main_shape, test))
+        if collided:
+            collisions.append(CollisionResult(collision, test, swap))
 
     return collisions
 
 
-def collides_multiple(container, main_shape):
+def collides_multiple(container, main_shape, dx=0, dy=0):
     collisions = []
-    for shape in container:
+    probe = get_probe(main_shape, dx, dy)
+    for shape in get_candidates(container, main_shape, dx, dy):
         if main_shape is not shape:
-            collided, _, _ = collides_unknown(main_shape, shape)
+            collided, _, _ = _collides(main_shape, probe, shape)
             if collided:
                 collisions.append(shape)
     return collisions
 
 
-def collides_name(container, shape, name):
+def collides_name(container, shape, name, dx=0, dy=0):
     """Check if colliding with named entity.
 
     Args:
         name (str): The name of the entity to check
+        dx (int, optional): Test shape offset along the x-axis by this amount.
+        dy (int, optional): Test shape offset along the y-axis by this amount.
 
     Returns:
         peachy.geo.Shape: Returns shape if colliding or None if no collision.
@@ -197,44 +565,75 @@ def collides_name(container, shape, name):
 
     target = container.get_name(name)
     if target:
-        collided, f, swap = collides_unknown(shape, target)
+        collided, f, swap = _collides(shape, get_probe(shape, dx, dy), target)
         if collided:
             return CollisionResult(f, target, swap)
     return None
 
 
-def collides_unknown(shape_a, shape_b):
-    collision, swap = get_collision_function(shape_a, shape_b)
-
-    if swap:
-        shape_a, shape_b = shape_b, shape_a
-
-    return collision(shape_a, shape_b), collision, swap
+def collides_unknown(shape_a, shape_b, dx=0, dy=0):
+    return _collides(shape_a, get_probe(shape_a, dx, dy), shape_b)
 
 
-def collides_solid(container, main_shape):
+def collides_solid(container, main_shape, dx=0, dy=0):
     """Check if colliding with any solid entity.
 
     Checks if self collides with any entity that has Entity.solid set as
-    True.
+    True, or with any solid tile of the container's collision_map (see
+    TileCollisionMap).
+
+    Example:
+        Check for ground directly below an entity, without moving it.
+        >>> collides_solid(self.container, self, dy=1)
 
     Args:
+        container (peachy.Room): The room the shapes are held in.
+        main_shape (peachy.geo.Shape): The shape to test.
+        dx (int, optional): Test main_shape offset along the x-axis by this
+            amount. Unlike main_shape.at_point(), no copy is made.
+        dy (int, optional): Test main_shape offset along the y-axis by this
+            amount.
 
     Returns:
-        list[peachy.Entity]: Every solid entity colliding with self.
+        list[peachy.collision.CollisionResult]: Every solid entity colliding
+            with self.
     """
     collisions = []
-    for shape in container:
+    probe = get_probe(main_shape, dx, dy)
+    for shape in get_candidates(container, main_shape, dx, dy):
         if shape is not main_shape and shape.active and shape.solid:
-            colliding, f, swap = collides_unknown(main_shape, shape)
+            colliding, f, swap = _collides(main_shape, probe, shape)
             if colliding:
                 collisions.append(CollisionResult(f, shape, swap))
+
+    collision_map = getattr(container, 'collision_map', None)
+    if collision_map is not None:
+        collisions.extend(collision_map.collides(main_shape, dx, dy))
     return collisions
 
 
+def _collides(shape, probe, target):
+    """Check if shape, represented by probe, is colliding with target.
+
+    The collision function is chosen using shape (probe may be a tuple).
+    """
+    collision, swap = get_collision_function(shape, target)
+
+    if swap:
+        return collision(target, probe), collision, swap
+    return collision(probe, target), collision, swap
+
+
 def circle_circle(circle_a, circle_b):
-    ax, ay, ar = circle_a
-    bx, by, br = circle_b
+    # Attribute access is much faster than unpacking a shape
+    if isinstance(circle_a, Circle):
+        ax, ay, ar = circle_a.x, circle_a.y, circle_a.radius
+    else:
+        ax, ay, ar = circle_a
+    if isinstance(circle_b, Circle):
+        bx, by, br = circle_b.x, circle_b.y, circle_b.radius
+    else:
+        bx, by, br = circle_b
 
     ax += ar
     ay += ar
@@ -264,6 +663,21 @@ def circle_point(circle, point):
     return (circle_x - point_x)**2 + (circle_y - point_y)**2 <= circle_r**2
 
 
+def circle_polygon(circle, polygon):
+    """Check if a circle is overlapping a polygon."""
+    cx, cy, cr = circle
+    cx += cr
+    cy += cr
+    points = list(polygon)
+
+    if point_polygon((cx, cy), points):
+        return True
+    for x1, y1, x2, y2 in _polygon_edges(points):
+        if _segment_distance_squared(cx, cy, x1, y1, x2, y2) <= cr**2:
+            return True
+    return False
+
+
 def line_line(line_a, line_b):
     a_x1, a_y1, a_x2, a_y2 = line_a
     b_x1, b_y1, b_x2, b_y2 = line_b
@@ -301,6 +715,19 @@ def line_point(line, point):
     return False
 
 
+def line_polygon(line, polygon):
+    """Check if a line is intersecting or inside of a polygon."""
+    x1, y1, x2, y2 = line
+    points = list(polygon)
+
+    if point_polygon((x1, y1), points):
+        return True
+    for edge in _polygon_edges(points):
+        if line_line(line, edge):
+            return True
+    return False
+
+
 def closest_point_on_line(line, point):
     x1, y1, x2, y2 = line
     px, py = point
@@ -349,6 +776,39 @@ def point_point(point_a, point_b):
     return ax == bx and ay == by
 
 
+def point_polygon(point, polygon):
+    """Check if a polygon contains a point (even-odd rule)."""
+    px, py = point
+    inside = False
+    for x1, y1, x2, y2 in _polygon_edges(list(polygon)):
+        if (y1 > py) != (y2 > py):
+            intercept = x1 + (py - y1) * (x2 - x1) / (y2 - y1)
+            if px < intercept:
+                inside = not inside
+    return inside
+
+
+def polygon_polygon(polygon_a, polygon_b):
+    """Check if two polygons are overlapping.
+
+    Polygons are overlapping if any of their edges intersect or if one polygon
+    lies inside of the other.
+    """
+    points_a = list(polygon_a)
+    points_b = list(polygon_b)
+
+    if point_polygon(points_a[0], points_b) or \
+       point_polygon(points_b[0], points_a):
+        return True
+
+    edges_b = _polygon_edges(points_b)
+    for edge_a in _polygon_edges(points_a):
+        for edge_b in edges_b:
+            if line_line(edge_a, edge_b):
+                return True
+    return False
+
+
 def rect_circle(rect, circle):
     """Check if rectangle and circle are overlapping
 
@@ -435,6 +895,14 @@ def rect_point(rect, point):
         return False
 
 
+def rect_polygon(rect, polygon):
+    """Check if a rectangle is overlapping a polygon."""
+    x, y, width, height = rect
+    return polygon_polygon(((x, y), (x + width, y),
+                            (x + width, y + height), (x, y + height)),
+                           polygon)
+
+
 def rect_rect(rect_a, rect_b):
     """Check if rectangle is colliding with another rectangle.
 
@@ -448,8 +916,17 @@ def rect_rect(rect_a, rect_b):
     Raises:
         AttributeError: The object provided was invalid.
     """
-    ax, ay, awidth, aheight = rect_a
-    bx, by, bwidth, bheight = rect_b
+    # Attribute access is much faster than unpacking a shape
+    if isinstance(rect_a, Rect):
+        ax, ay = rect_a.x, rect_a.y
+        awidth, aheight = rect_a.width, rect_a.height
+    else:
+        ax, ay, awidth, aheight = rect_a
+    if isinstance(rect_b, Rect):
+        bx, by = rect_b.x, rect_b.y
+        bwidth, bheight = rect_b.width, rect_b.height
+    else:
+        bx, by, bwidth, bheight = rect_b
 
     right_a = ax + awidth
     bottom_a = ay + aheight
@@ -458,3 +935,322 @@ def rect_rect(rect_a, rect_b):
 
     return (ax < right_b and right_a > bx and
             ay < bottom_b and bottom_a > by)
+
+
+def sweep(shape, dx, dy, target):
+    """Find when a moving shape first collides with a stationary target.
+
+    Continuous alternative to testing shape.at_point() every pixel along the
+    movement; fast shapes can not tunnel through thin targets. Supports
+    rectangles and circles.
+
+    Args:
+        shape (peachy.geo.Rect, peachy.geo.Circle): The moving shape.
+        dx (int): The movement along the x-axis.
+        dy (int): The movement along the y-axis.
+        target (peachy.geo.Rect, peachy.geo.Circle): The stationary shape.
+
+    Returns:
+        peachy.collision.SweepResult: The time of impact and contact normal, or
+            None if the shapes do not collide during the movement.
+    """
+    sweep_function = _sweep_functions.get((shape.shapeid, target.shapeid))
+    if sweep_function is None:
+        return None
+
+    hit = sweep_function(shape, dx, dy, target)
+    if hit is not None:
+        return SweepResult(hit[0], hit[1], target)
+    return None
+
+
+def sweep_circle_circle(circle, dx, dy, target):
+    """Sweep a circle against a circle.
+
+    Returns:
+        tuple[float, tuple[int, int]]: Time of impact and contact normal, or
+            None if there is no collision.
+    """
+    ax, ay, ar = circle
+    bx, by, br = target
+    return _ray_circle(ax + ar, ay + ar, dx, dy, bx + br, by + br, ar + br)
+
+
+def sweep_circle_rect(circle, dx, dy, rect):
+    """Sweep a circle against a rectangle.
+
+    Returns:
+        tuple[float, tuple[int, int]]: Time of impact and contact normal, or
+            None if there is no collision.
+    """
+    cx, cy, radius = circle
+    x, y, width, height = rect
+    cx += radius
+    cy += radius
+
+    hit = _ray_rect(cx, cy, dx, dy, x - radius, y - radius,
+                    width + radius * 2, height + radius * 2)
+    if hit is None:
+        return None
+
+    # Contact with a corner of the expanded rectangle must be tested against
+    # the rounded corner instead.
+    time = hit[0]
+    px = cx + dx * time
+    py = cy + dy * time
+    corner_x = x if px < x else x + width if px > x + width else None
+    corner_y = y if py < y else y + height if py > y + height else None
+    if corner_x is not None and corner_y is not None:
+        return _ray_circle(cx, cy, dx, dy, corner_x, corner_y, radius)
+    return hit
+
+
+def sweep_rect_circle(rect, dx, dy, circle):
+    """Sweep a rectangle against a circle.
+
+    Returns:
+        tuple[float, tuple[int, int]]: Time of impact and contact normal, or
+            None if there is no collision.
+    """
+    hit = sweep_circle_rect(circle, -dx, -dy, rect)
+    if hit is not None:
+        time, (normal_x, normal_y) = hit
+        return time, (-normal_x, -normal_y)
+    return None
+
+
+def sweep_rect_rect(rect, dx, dy, target):
+    """Sweep a rectangle against a rectangle (swept AABB).
+
+    Returns:
+        tuple[float, tuple[int, int]]: Time of impact and contact normal, or
+            None if there is no collision.
+    """
+    ax, ay, awidth, aheight = rect
+    bx, by, bwidth, bheight = target
+    return _ray_rect(ax, ay, dx, dy, bx - awidth, by - aheight,
+                     bwidth + awidth, bheight + aheight)
+
+
+def sweep_solid(container, shape, dx, dy):
+    """Find the first solid entity, or solid tile of the container's
+    collision_map, a moving shape collides with.
+
+    Args:
+        container (peachy.Room): The room the shapes are held in.
+        shape (peachy.geo.Rect, peachy.geo.Circle): The moving shape.
+        dx (int): The movement along the x-axis.
+        dy (int): The movement along the y-axis.
+
+    Returns:
+        peachy.collision.SweepResult: The earliest collision along the
+            movement, or None if shape can move freely.
+    """
+    if getattr(container, 'spatial_hash', None) is None:
+        candidates = container
+    else:
+        x, y, width, height = get_bounds(shape)
+        candidates = container.spatial_hash.query(
+            min(x, x + dx), min(y, y + dy),
+            width + abs(dx), height + abs(dy))
+
+    first = None
+    collision_map = getattr(container, 'collision_map', None)
+    if collision_map is not None:
+        first = collision_map.sweep(shape, dx, dy)
+
+    for target in candidates:
+        if target is not shape and target.active and target.solid:
+            result = sweep(shape, dx, dy, target)
+            if result is not None and \
+               (first is None or result.time < first.time):
+                first = result
+    return first
+
+
+def sweep_tiles(shape, dx, dy, tiles, tile_width, tile_height):
+    """Find the first solid tile a moving shape collides with.
+
+    Only the tiles covered by the movement are tested.
+
+    Args:
+        shape (peachy.geo.Rect, peachy.geo.Circle): The moving shape.
+        dx (int): The movement along the x-axis.
+        dy (int): The movement along the y-axis.
+        tiles (list[list[int]]): Tiles indexed by [y][x], such as the data of a
+            pytmx.TiledTileLayer. Any tile that is not 0 is solid.
+        tile_width (int): The width of a single tile.
+        tile_height (int): The height of a single tile.
+
+    Returns:
+        peachy.collision.SweepResult: The earliest collision along the
+            movement, or None if shape can move freely. SweepResult.shape is a
+            Rect covering the tile that was hit.
+    """
+    x, y, width, height = get_bounds(shape)
+    left = int(min(x, x + dx) // tile_width)
+    top = int(min(y, y + dy) // tile_height)
+    right = int((max(x, x + dx) + width) // tile_width)
+    bottom = int((max(y, y + dy) + height) // tile_height)
+
+    rows = len(tiles)
+    columns = len(tiles[0]) if rows else 0
+    first = None
+
+    for tile_y in range(max(top, 0), min(bottom, rows - 1) + 1):
+        row = tiles[tile_y]
+        for tile_x in range(max(left, 0), min(right, columns - 1) + 1):
+            if row[tile_x]:
+                tile = Rect(tile_x * tile_width, tile_y * tile_height,
+                            tile_width, tile_height)
+                result = sweep(shape, dx, dy, tile)
+                if result is not None and \
+                   (first is None or result.time < first.time):
+                    first = result
+    return first
+
+
+def _polygon_edges(points):
+    return [(x1, y1, x2, y2) for (x1, y1), (x2, y2) in
+            zip(points, points[1:] + points[:1])]
+
+
+def _ray_circle(ox, oy, dx, dy, cx, cy, radius):
+    """Intersect the ray (ox, oy) + t * (dx, dy), 0 <= t <= 1, with a
+    circle.
+    """
+    fx = ox - cx
+    fy = oy - cy
+    c = fx * fx + fy * fy - radius * radius
+    if c < 0:
+        return 0, (0, 0)  # Already overlapping
+
+    a = dx * dx + dy * dy
+    b = 2 * (fx * dx + fy * dy)
+    discriminant = b * b - 4 * a * c
+    if a == 0 or b >= 0 or discriminant < 0:
+        return None  # Not moving, moving away or missing
+
+    time = (-b - math.sqrt(discriminant)) / (2 * a)
+    if time > 1:
+        return None
+
+    normal_x = (fx + dx * time) / radius
+    normal_y = (fy + dy * time) / radius
+    return time, (normal_x, normal_y)
+
+
+def _ray_rect(ox, oy, dx, dy, x, y, width, height):
+    """Intersect the ray (ox, oy) + t * (dx, dy), 0 <= t <= 1, with a
+    rectangle. Touching edges do not collide unless moving into them.
+    """
+    if dx == 0:
+        if not x < ox < x + width:
+            return None
+        near_x, far_x = -math.inf, math.inf
+    else:
+        near_x = (x - ox) / dx
+        far_x = (x + width - ox) / dx
+        if near_x > far_x:
+            near_x, far_x = far_x, near_x
+
+    if dy == 0:
+        if not y < oy < y + height:
+            return None
+        near_y, far_y = -math.inf, math.inf
+    else:
+        near_y = (y - oy) / dy
+        far_y = (y + height - oy) / dy
+        if near_y > far_y:
+            near_y, far_y = far_y, near_y
+
+    near = max(near_x, near_y)
+    far = min(far_x, far_y)
+
+    if near >= far or far <= 0 or near > 1:
+        return None
+    if near < 0:
+        return 0, (0, 0)  # Already overlapping
+
+    if near_x > near_y:
+        return near, (-1 if dx > 0 else 1, 0)
+    return near, (0, -1 if dy > 0 else 1)
+
+
+def _segment_distance_squared(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        t = 0
+    else:
+        t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_squared))
+    cx = x1 + t * dx
+    cy = y1 + t * dy
+    return (px - cx)**2 + (py - cy)**2
+
+
+def _line_bounds(line):
+    x1, y1, x2, y2 = line
+    return min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1)
+
+
+def _line_offset(line, dx, dy):
+    x1, y1, x2, y2 = line
+    return x1 + dx, y1 + dy, x2 + dx, y2 + dy
+
+
+def _polygon_offset(polygon, dx, dy):
+    return [(px + dx, py + dy) for px, py in polygon]
+
+
+def _polygon_bounds(polygon):
+    points = list(polygon)
+    xs = [px for px, _ in points]
+    ys = [py for _, py in points]
+    return min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)
+
+
+# Dispatch tables, keyed by shapeid. Filled in below and by
+# register_collision_function() and register_bounds_function().
+_NO_COLLISION_FUNCTION = (None, False)
+_collision_table = {}  # (shapeid_a, shapeid_b) -> (function, swap)
+_bounds_functions = {
+    ShapeEnum.RECT: lambda r: (r.x, r.y, r.width, r.height),
+    ShapeEnum.CIRCLE: lambda c: (c.x, c.y, c.radius * 2, c.radius * 2),
+    ShapeEnum.LINE: _line_bounds,
+    ShapeEnum.POINT: lambda p: (p.x, p.y, 0, 0),
+    ShapeEnum.POLYGON: _polygon_bounds
+}
+
+_offset_functions = {
+    ShapeEnum.RECT: lambda r, dx, dy: (r.x + dx, r.y + dy, r.width, r.height),
+    ShapeEnum.CIRCLE: lambda c, dx, dy: (c.x + dx, c.y + dy, c.radius),
+    ShapeEnum.LINE: _line_offset,
+    ShapeEnum.POINT: lambda p, dx, dy: (p.x + dx, p.y + dy),
+    ShapeEnum.POLYGON: _polygon_offset
+}
+_sweep_functions = {
+    (ShapeEnum.RECT, ShapeEnum.RECT): sweep_rect_rect,
+    (ShapeEnum.RECT, ShapeEnum.CIRCLE): sweep_rect_circle,
+    (ShapeEnum.CIRCLE, ShapeEnum.RECT): sweep_circle_rect,
+    (ShapeEnum.CIRCLE, ShapeEnum.CIRCLE): sweep_circle_circle
+}
+
+register_collision_function(ShapeEnum.RECT, ShapeEnum.RECT, rect_rect)
+register_collision_function(ShapeEnum.RECT, ShapeEnum.CIRCLE, rect_circle)
+register_collision_function(ShapeEnum.RECT, ShapeEnum.LINE, rect_line)
+register_collision_function(ShapeEnum.RECT, ShapeEnum.POINT, rect_point)
+register_collision_function(ShapeEnum.RECT, ShapeEnum.POLYGON, rect_polygon)
+register_collision_function(ShapeEnum.CIRCLE, ShapeEnum.CIRCLE, circle_circle)
+register_collision_function(ShapeEnum.CIRCLE, ShapeEnum.LINE, circle_line)
+register_collision_function(ShapeEnum.CIRCLE, ShapeEnum.POINT, circle_point)
+register_collision_function(ShapeEnum.CIRCLE, ShapeEnum.POLYGON,
+                            circle_polygon)
+register_collision_function(ShapeEnum.LINE, ShapeEnum.LINE, line_line)
+register_collision_function(ShapeEnum.LINE, ShapeEnum.POINT, line_point)
+register_collision_function(ShapeEnum.LINE, ShapeEnum.POLYGON, line_polygon)
+register_collision_function(ShapeEnum.POINT, ShapeEnum.POINT, point_point)
+register_collision_function(ShapeEnum.POINT, ShapeEnum.POLYGON, point_polygon)
+register_collision_function(ShapeEnum.POLYGON, ShapeEnum.POLYGON,
+                            polygon_polygon)
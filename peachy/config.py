@@ -14,6 +14,11 @@ Loading configuration:
 FIXED_TIMESTEP = 0
 VARIABLE_TIMESTEP = 1
 
+SCALE_NEAREST = 'nearest'
+SCALE_2X = 'scale2x'
+SCALE_SMOOTH = 'smooth'
+SCALE_MODES = (SCALE_NEAREST, SCALE_2X, SCALE_SMOOTH)
+
 
 class PeachyConfiguration(object):
     """Configuration.
@@ -40,15 +45,23 @@ class PeachyConfiguration(object):
     DEFAULT_FONT = ''  # TODO
 
     """Amount of render calls per second and amount of update calls per second,
-    respectively.
-    Note: not fully implemented, currently FRAMES_PER_SECOND is used for both.
+    respectively. Updates run on a fixed timestep independent of rendering
+    unless VARIABLE_TIMESTEP is enabled.
     """
     FRAMES_PER_SECOND = 60
     UPDATES_PER_SECOND = 60
 
-    """VARIABLE_TIMESTEP & MAX_FRAMESKIP (not yet implemented)"""
+    """If VARIABLE_TIMESTEP is enabled, every render is preceded by exactly one
+    update (the simulation slows down with rendering). Otherwise, updates are
+    run on a fixed timestep of 1 / UPDATES_PER_SECOND.
+
+    MAX_FRAMESKIP is the maximum amount of renders that may be skipped to let
+    the updates catch up when the game falls behind. If exceeded, the remaining
+    time is dropped and the simulation slows down instead. A negative value
+    removes the cap.
+    """
     VARIABLE_TIMESTEP = False
-    MAX_FRAMESKIP = -1
+    MAX_FRAMESKIP = 5
 
     """Title that will be displayed in window caption."""
     TITLE = 'Game'
@@ -62,3 +75,9 @@ class PeachyConfiguration(object):
 
     """Multiplier to scale the screen by. Will increase window size."""
     VIEW_SCALE = 1
+
+    """Filter used to scale the rendering surface up to the window. One of
+    SCALE_NEAREST (sharp pixels), SCALE_2X (pixel art smoothing, see
+    pygame.transform.scale2x) or SCALE_SMOOTH (bilinear filtering).
+    """
+    VIEW_SCALE_MODE = SCALE_NEAREST
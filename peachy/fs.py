@@ -72,7 +72,7 @@ def load_image(resource_path):
 
     try:
         image = pygame.image.load(resource_path)
-        image.convert_alpha()
+        image = image.convert_alpha()
         return image
 
     except pygame.error:
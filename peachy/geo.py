@@ -3,6 +3,9 @@
 Geometric shape representations. The majority of these shapes are for
 convenience, except for Rect which is used extensively throughout peachy (a
 primary example being peachy.Entity).
+
+Shapes use __slots__ to keep them small and fast to access. Subclasses that do
+not declare __slots__ (ie. an Entity mixin) can still hold any attribute.
 """
 import copy
 import enum
@@ -13,6 +16,7 @@ class ShapeEnum(enum.IntEnum):
     CIRCLE = 1
     LINE = 2
     POINT = 3
+    POLYGON = 4
     RECT = 0
 
 
@@ -50,11 +54,24 @@ def distance_between_shapes(shape_a, shape_b):
 
 
 class Shape(object):
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return tuple(self) == tuple(other) and \
+                getattr(self, '__dict__', None) == \
+                getattr(other, '__dict__', None)
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+
     def at_point(self, x=None, y=None):
         """Return a copy of a shape at a specified point.
 
         The purpose of this function is to move a shape before doing collision
-        checks on it.
+        checks on it. Note that this copies the shape (and the Entity it may
+        belong to); the collides_* functions in peachy.collision accept a dx
+        and dy offset that avoids the copy.
 
         Args:
             x (int, optional): The x coordinate to relocate to.
@@ -79,22 +96,15 @@ class Circle(Shape):
         y (int): The y-coordinate of the circle.
         radius (int): The radius of the circle.
     """
+    __slots__ = ('x', 'y', 'radius')
+
     def __init__(self, x, y, radius):
         self.x = x
         self.y = y
         self.radius = radius
 
-    def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
-        if isinstance(other, tuple):
-            return self.x == other[0] and self.y == other[1] and \
-                self.radius == other[3]
-
     def __iter__(self):
-        yield self.x
-        yield self.y
-        yield self.radius
+        return iter((self.x, self.y, self.radius))
 
     def __str__(self):
         return "({}, {}, {})".format(self.x, self.y, self.radius)
@@ -148,22 +158,16 @@ class Line(Shape):
         p1 (peachy.geo.Point): The first point of the line.
         p2 (peachy.geo.Point): The second point of the line.
     """
+    __slots__ = ('p1', 'p2')
+
     def __init__(self, x1, y1, x2, y2):
         self.p1 = Point(x1, y1)
         self.p2 = Point(x2, y2)
 
-    def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
-        if isinstance(other, tuple):
-            return self.p1.x == other[0] and self.p1.y == other[1] \
-                and self.p2.x == other[2] and self.p2.y == other[3]
-
     def __iter__(self):
-        yield self.p1.x
-        yield self.p1.y
-        yield self.p2.x
-        yield self.p2.y
+        p1 = self.p1
+        p2 = self.p2
+        return iter((p1.x, p1.y, p2.x, p2.y))
 
     def __str__(self):
         return "{}, {}".format(self.p1, self.p2)
@@ -194,19 +198,14 @@ class Point(Shape):
         x (int): The x-coordinate.
         y (int): The y-coordinate.
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x=0, y=0):
         self.x = x
         self.y = y
 
-    def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
-        if isinstance(other, tuple):
-            return self.x == other[0] and self.y == other[1]
-
     def __iter__(self):
-        yield self.x
-        yield self.y
+        return iter((self.x, self.y))
 
     def __str__(self):
         return "({0}, {1})".format(self.x, self.y)
@@ -220,6 +219,50 @@ class Point(Shape):
         return ShapeEnum.POINT
 
 
+class Polygon(Shape):
+    """2D Polygon
+
+    Attributes:
+        x (int): The x-coordinate the points are relative to.
+        y (int): The y-coordinate the points are relative to.
+        points (list[tuple[int, int]]): The points of the polygon, in order,
+            relative to (x, y).
+    """
+    __slots__ = ('points', 'x', 'y')
+
+    def __init__(self, points, x=0, y=0):
+        self.points = [tuple(point) for point in points]
+        self.x = x
+        self.y = y
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple)):
+            return list(self) == [tuple(point) for point in other]
+        return super().__eq__(other)
+
+    def __iter__(self):
+        for px, py in self.points:
+            yield (self.x + px, self.y + py)
+
+    def __str__(self):
+        return str(list(self))
+
+    @property
+    def center(self):
+        """The average of every point of the polygon.
+
+        Returns:
+            tuple (int, int): center x and center y, respectively.
+        """
+        count = len(self.points)
+        return (self.x + sum(px for px, _ in self.points) / count,
+                self.y + sum(py for _, py in self.points) / count)
+
+    @property
+    def shapeid(self):
+        return ShapeEnum.POLYGON
+
+
 class Rect(Shape):
     """2D Rectangle
 
@@ -229,6 +272,8 @@ class Rect(Shape):
         width (int): Width of rectangle
         height (int): Height of rectangle
     """
+    __slots__ = ('x', 'y', 'width', 'height')
+
     def __init__(self, x, y, width=None, height=None):
         if width is None or height is None:
             width = x
@@ -241,21 +286,11 @@ class Rect(Shape):
         self.width = width
         self.height = height
 
-    def __eq__(self, other):
-        if isinstance(other, self.__class__):
-            return self.__dict__ == other.__dict__
-        if isinstance(other, tuple):
-            return self.x == other[0] and \
-                self.y == other[1] and \
-                self.width == other[2] and \
-                self.height == other[3]
-
     def __getitem__(self, i):
-        return self.ls()[i]
+        return (self.x, self.y, self.width, self.height)[i]
 
     def __iter__(self):
-        for attribute in self.ls():
-            yield attribute
+        return iter((self.x, self.y, self.width, self.height))
 
     def __setitem__(self, index, value):
         if index == 0:
@@ -1,6 +1,7 @@
 """Peachy Graphics module
 """
 import math
+from collections import OrderedDict
 
 import pygame
 from pygame import Surface
@@ -12,6 +13,12 @@ from peachy.geo import Point
 FLIP_X = 0x01
 FLIP_Y = 0x02
 
+"""The maximum amount of scratch surfaces kept for translucent drawing."""
+SCRATCH_SURFACE_LIMIT = 32
+
+"""The maximum amount of transformed surfaces kept by transform()."""
+TRANSFORM_CACHE_LIMIT = 256
+
 _default_context = None
 _context = None
 _context_rect = None
@@ -22,6 +29,18 @@ _translation = Point()
 _color = pygame.Color(0, 0, 0)
 _font = None
 
+# Regions of the default context drawn to, None if not tracking. See
+# set_dirty_tracking()
+_dirty_rects = None
+
+# Transparent surfaces reused by translucent draw functions, keyed by size and
+# ordered by least recently used. See _scratch_surface()
+_scratch_surfaces = OrderedDict()
+
+# Transformed surfaces keyed by (surface, flip, rotate, scale) and ordered by
+# least recently used. See transform()
+_transform_cache = OrderedDict()
+
 
 # Drawing
 
@@ -40,12 +59,11 @@ def draw(image, x, y, args=0):
     bounds = image.get_rect().move(x, y)
 
     if bounds.colliderect(_context_rect):
-        if args & FLIP_X:
-            image = pygame.transform.flip(image, True, False)
-        if args & FLIP_Y:
-            image = pygame.transform.flip(image, False, True)
+        if args & (FLIP_X | FLIP_Y):
+            image = pygame.transform.flip(image, bool(args & FLIP_X),
+                                          bool(args & FLIP_Y))
 
-        _context.blit(image, (x, y))
+        _dirty(_context.blit(image, (x, y)))
 
 
 def draw_arc(x, y, r, start, end):
@@ -70,7 +88,7 @@ def draw_arc(x, y, r, start, end):
     if alpha:
         draw_polygon(points)
     else:
-        pygame.draw.polygon(_context, _color, points)
+        _dirty(pygame.draw.polygon(_context, _color, points))
 
 
 def draw_entity_rect(entity):
@@ -83,11 +101,11 @@ def draw_circle(x, y, r):
 
     try:
         assert _color[3] < 255
-        temp = Surface((r * 2, r * 2), pygame.SRCALPHA)
+        temp = _scratch_surface(r * 2, r * 2)
         pygame.draw.circle(temp, _color, (r, r), r)
-        _context.blit(temp, (x - r, y - r))
+        _dirty(_context.blit(temp, (x - r, y - r)))
     except (AssertionError, IndexError):
-        pygame.draw.circle(_context, _color, (x, y), r)
+        _dirty(pygame.draw.circle(_context, _color, (x, y), r))
 
 
 def draw_line(x1, y1, x2, y2):
@@ -96,18 +114,29 @@ def draw_line(x1, y1, x2, y2):
     y1 -= _translation.y
     y2 -= _translation.y
 
-    pygame.draw.line(_context, _color, (x1, y1), (x2, y2))
+    _dirty(pygame.draw.line(_context, _color, (x1, y1), (x2, y2)))
 
 
 def draw_polygon(points, aa=False):
     if aa:
         gfxdraw.filled_polygon(_context, points, _color)
         gfxdraw.aapolygon(_context, points, _color)
+        if _dirty_rects is not None:
+            xs = [px for px, _ in points]
+            ys = [py for _, py in points]
+            _dirty(pygame.Rect(min(xs), min(ys), max(xs) - min(xs) + 1,
+                               max(ys) - min(ys) + 1))
     else:
-        temp = Surface((_context.get_width(), _context.get_height()),
-                       pygame.SRCALPHA)
-        pygame.draw.polygon(temp, _color, points)
-        _context.blit(temp, (-_translation.x, -_translation.y))
+        left = int(min(px for px, _ in points))
+        top = int(min(py for _, py in points))
+        right = int(math.ceil(max(px for px, _ in points)))
+        bottom = int(math.ceil(max(py for _, py in points)))
+
+        temp = _scratch_surface(right - left + 1, bottom - top + 1)
+        pygame.draw.polygon(temp, _color,
+                            [(px - left, py - top) for px, py in points])
+        _dirty(_context.blit(temp, (left - _translation.x,
+                                    top - _translation.y)))
 
 
 def draw_rect(x, y, width, height, thickness=0):
@@ -117,14 +146,15 @@ def draw_rect(x, y, width, height, thickness=0):
 
     try:
         assert _color[3] < 255
-        temp = Surface((width, height), pygame.SRCALPHA)
+        temp = _scratch_surface(width, height)
         if thickness <= 0:
             temp.fill(_color)
         else:
             pygame.draw.rect(temp, _color, (0, 0, width, height), thickness)
-        _context.blit(temp, (x, y))
+        _dirty(_context.blit(temp, (x, y)))
     except (AssertionError, IndexError):
-        pygame.draw.rect(_context, _color, (x, y, width, height), thickness)
+        _dirty(pygame.draw.rect(_context, _color, (x, y, width, height),
+                                thickness))
 
 
 def draw_rounded_rect(x, y, width, height, radius):
@@ -135,9 +165,9 @@ def draw_rounded_rect(x, y, width, height, radius):
     color.a = 0
     pos = rect.topleft
     rect.topleft = (0, 0)
-    rectangle = Surface(rect.size, pygame.SRCALPHA)
+    rectangle = _scratch_surface(*rect.size)
 
-    circle = Surface([min(rect.size) * 3] * 2, pygame.SRCALPHA)
+    circle = _scratch_surface(*[min(rect.size) * 3] * 2)
     pygame.draw.ellipse(circle, (0, 0, 0), circle.get_rect(), 0)
     circle = pygame.transform.smoothscale(circle,
                                           [int(min(rect.size) * radius)] * 2)
@@ -156,7 +186,7 @@ def draw_rounded_rect(x, y, width, height, radius):
     rectangle.fill(color, special_flags=pygame.BLEND_RGBA_MAX)
     rectangle.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MIN)
 
-    _context.blit(rectangle, pos)
+    _dirty(_context.blit(rectangle, pos))
 
 
 def draw_text(text, x, y, aa=True, center=False, font=None):
@@ -170,7 +200,7 @@ def draw_text(text, x, y, aa=True, center=False, font=None):
     if center:
         text_rect.centerx = _context_rect.centerx
 
-    _context.blit(text_surface, text_rect)
+    _dirty(_context.blit(text_surface, text_rect))
 
 
 """ State Modification """
@@ -181,6 +211,22 @@ def font():
     return _font
 
 
+def pop_dirty_rects():
+    """Get every region of the default context drawn to since the last call.
+
+    Returns:
+        list[pygame.Rect]: The regions drawn to, or an empty list if dirty
+            tracking is disabled.
+    """
+    global _dirty_rects
+
+    if _dirty_rects is None:
+        return []
+    rects = _dirty_rects
+    _dirty_rects = []
+    return rects
+
+
 def pop_context():
     """ Revert to the previous graphics context """
     global _context_stack
@@ -262,6 +308,17 @@ def set_context(new_context):
     _context_rect = new_context.get_rect()
 
 
+def set_dirty_tracking(enabled):
+    """Enable or disable recording the regions drawn to.
+
+    While enabled, every draw function records the region of the default
+    context it touched. Used by peachy.Engine for dirty rect rendering, see
+    pop_dirty_rects().
+    """
+    global _dirty_rects
+    _dirty_rects = [] if enabled else None
+
+
 def set_default_context(default_context):
     global _default_context
     _default_context = default_context
@@ -283,9 +340,49 @@ def translate(x, y, absolute=True):
         _translation.y += y
 
 
+def view():
+    """Get the region visible within the current context.
+
+    Returns:
+        pygame.Rect: The context's bounds offset by the current translation,
+            in the same coordinates passed to draw functions.
+    """
+    return _context_rect.move(_translation.x, _translation.y)
+
+
+def _scratch_surface(width, height):
+    """Get a cleared, transparent surface for temporary drawing.
+
+    Surfaces are reused between calls, so the result is only valid until the
+    next call requesting the same size. Keeps at most SCRATCH_SURFACE_LIMIT
+    surfaces, discarding the least recently used.
+    """
+    size = (max(int(width), 0), max(int(height), 0))
+    surface = _scratch_surfaces.pop(size, None)
+    if surface is None:
+        surface = Surface(size, pygame.SRCALPHA)
+        if len(_scratch_surfaces) >= SCRATCH_SURFACE_LIMIT:
+            _scratch_surfaces.popitem(last=False)
+    else:
+        surface.fill((0, 0, 0, 0))
+    _scratch_surfaces[size] = surface
+    return surface
+
+
+def _dirty(rect):
+    """Record a region drawn to if dirty tracking is enabled."""
+    if _dirty_rects is not None and _context is _default_context:
+        _dirty_rects.append(rect)
+
+
 """ Image Manip """
 
 
+def clear_transform_cache():
+    """Discard every surface kept by transform()."""
+    _transform_cache.clear()
+
+
 def flip(image, x, y):
     return pygame.transform.flip(image, x, y)
 
@@ -325,6 +422,49 @@ def splice(image, frame_width, frame_height, margin_x=0, margin_y=0):
     return sub_images
 
 
+def transform(image, flip=0, rotate=0, scale=1):
+    """Get a flipped, rotated and scaled copy of image.
+
+    Results are cached, so transforming the same image every frame only
+    performs the transformation once. The cache holds at most
+    TRANSFORM_CACHE_LIMIT surfaces, discarding the least recently used. Images
+    are assumed not to change once transformed, use clear_transform_cache()
+    otherwise. draw() does not use this cache.
+
+    Every transformation uses nearest neighbor filtering, keeping pixels
+    sharp.
+
+    Args:
+        image (Surface): The surface to transform.
+        flip (int, optional): FLIP_X and/or FLIP_Y.
+        rotate (float, optional): Degrees to rotate counterclockwise.
+        scale (float, optional): Amount to scale by.
+
+    Returns:
+        Surface: The transformed image. Do not draw onto it.
+    """
+    if not flip and not rotate and scale == 1:
+        return image
+
+    key = (image, flip, rotate, scale)
+    result = _transform_cache.pop(key, None)
+    if result is None:
+        result = image
+        if flip:
+            result = pygame.transform.flip(result, bool(flip & FLIP_X),
+                                           bool(flip & FLIP_Y))
+        if rotate:
+            result = pygame.transform.rotate(result, rotate)
+        if scale != 1:
+            result = pygame.transform.scale(
+                result, (int(result.get_width() * scale),
+                         int(result.get_height() * scale)))
+        if len(_transform_cache) >= TRANSFORM_CACHE_LIMIT:
+            _transform_cache.popitem(last=False)
+    _transform_cache[key] = result
+    return result
+
+
 class Context(object):
     def __init__(self, width=0, height=0, x=0, y=0, surface=None):
         # TODO attempt to make hardware surface first
@@ -348,6 +488,100 @@ class Context(object):
         self.height = height
 
 
+class DrawList(object):
+    """A batch of images drawn to the current context in a single call.
+
+    Collects images with add() and draws all of them at once with draw().
+    Culling is performed in bulk (see pygame.Rect.collidelistall) and the
+    remaining images are submitted through Surface.blits. Most effective when
+    kept between frames, such as for static tilemap layers, as only culling and
+    blitting are performed when drawn.
+
+    Example:
+        >>> batch = peachy.graphics.DrawList()
+        >>> for tile in tiles:
+        >>>     batch.add(tile.image, tile.x, tile.y)
+        >>> batch.draw(clear=False)  # Once per frame
+
+    Attributes:
+        items (list[tuple]): The (image, area, args) of every image added.
+        rects (list[pygame.Rect]): Where each item is drawn, in order.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.rects = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, image, x, y, area=None, args=0):
+        """Add an image to be drawn.
+
+        Args:
+            image (Surface): The surface to draw.
+            x (int): The x-coordinate to draw the image at.
+            y (int): The y-coordinate to draw the image at.
+            area (pygame.Rect, optional): The portion of image to draw.
+            args (int, optional): FLIP_X and/or FLIP_Y.
+        """
+        if area is None:
+            self.rects.append(image.get_rect(topleft=(x, y)))
+        else:
+            self.rects.append(pygame.Rect(x, y, area[2], area[3]))
+        self.items.append((image, area, args))
+
+    def clear(self):
+        """Remove every image from this batch."""
+        self.items.clear()
+        self.rects.clear()
+
+    def draw(self, clear=True):
+        """Draw every image in this batch to the current context.
+
+        Args:
+            clear (bool, optional): Empty the batch after drawing. Disable to
+                draw the same images again next frame.
+
+        Returns:
+            int: The amount of images drawn (not culled).
+        """
+        items = self.items
+        rects = self.rects
+        tx = _translation.x
+        ty = _translation.y
+        translated = tx or ty
+
+        sequence = []
+        view = _context_rect.move(tx, ty)
+        for index in view.collidelistall(rects):
+            image, area, args = items[index]
+            dest = rects[index]
+            if translated:
+                dest = dest.move(-tx, -ty)
+
+            if args & (FLIP_X | FLIP_Y):
+                image = pygame.transform.flip(image, bool(args & FLIP_X),
+                                              bool(args & FLIP_Y))
+                if area is not None:
+                    # Mirror the area to keep drawing the same region
+                    area = pygame.Rect(area)
+                    if args & FLIP_X:
+                        area.x = image.get_width() - area.right
+                    if args & FLIP_Y:
+                        area.y = image.get_height() - area.bottom
+            sequence.append((image, dest, area))
+
+        if _dirty_rects is not None and _context is _default_context:
+            _dirty_rects.extend(_context.blits(sequence))
+        else:
+            _context.blits(sequence, False)
+
+        if clear:
+            self.clear()
+        return len(sequence)
+
+
 class SpriteMap(object):
 
     def __init__(self, source, frame_width, frame_height,
@@ -370,6 +604,7 @@ class SpriteMap(object):
 
         self.frames = splice(source, frame_width, frame_height,
                              margin[0], margin[1])
+        self.flipped_frames = dict()
         self.frame_width = frame_width
         self.frame_height = frame_height
 
@@ -390,6 +625,22 @@ class SpriteMap(object):
         }
         self.animations[name] = animation
 
+    def get_frame(self, index, flip=0):
+        """Get a frame, flipped along the axes specified by flip (FLIP_X and/or
+        FLIP_Y). Flipped frames are created once and kept for reuse.
+        """
+        if not flip:
+            return self.frames[index]
+
+        key = (index, flip)
+        frame = self.flipped_frames.get(key)
+        if frame is None:
+            frame = pygame.transform.flip(self.frames[index],
+                                          bool(flip & FLIP_X),
+                                          bool(flip & FLIP_Y))
+            self.flipped_frames[key] = frame
+        return frame
+
     def pause(self):
         self.paused = True
 
@@ -430,7 +681,7 @@ class SpriteMap(object):
                 args = args | FLIP_X
             if self.flipped_y:
                 args = args | FLIP_Y
-            draw(self.frames[frame], x, y, args)
+            draw(self.get_frame(frame, args), x, y)
 
     def resume(self):
         self.paused = False
@@ -14,25 +14,72 @@ class ResourceType(enum.Enum):
 
 
 class ResourceManager(object):
+    """Stores resources by name.
+
+    Resources are also indexed by path and by group, so that every lookup is
+    performed in constant time. Add and remove resources using the methods
+    provided rather than modifying resources directly, to keep the indexes up
+    to date.
+    """
+
     def __init__(self):
         self.outline = None
         self.resources = dict()
         self.bundles = []
 
+        # Resources keyed by path and by group, then by name
+        self._paths = dict()
+        self._groups = dict()
+
     def __contains__(self, resource):
         if isinstance(resource, Resource):
-            for res in self.resources.values():
-                if res == resource:
-                    return True
-        else:
-            for res in self.resources.values():
-                if res.name == resource or res.path == resource:
-                    return True
-        return False
+            return self.resources.get(resource.name) is resource
+        return resource in self.resources or resource in self._paths
 
     def __len__(self):
         return len(self.resources)
 
+    def acquire_resource(self, res_path, res_type, res_name=None,
+                         **optional):
+        """Reference a resource, loading it only if it is not loaded yet.
+
+        Resources are shared by everything that acquires them. Each call to
+        acquire_resource must be matched with a call to release_resource, the
+        resource is removed once every reference has been released.
+        Resources loaded or added any other way are never shared, nor removed
+        by release_resource.
+
+        Args:
+            res_path (str): The path of the resource file.
+            res_type (ResourceType): The type of resource.
+            res_name (str, optional): The name the resource is shared under,
+                res_path by default. Only a resource of this name that was
+                acquired from res_path is reused.
+
+        Returns:
+            Resource: The shared resource, or None if it could not be loaded
+                or res_name is taken by another resource.
+        """
+        if res_name is None:
+            res_name = res_path
+
+        resource = self.resources.get(res_name)
+        if resource is not None:
+            if not resource.acquired or resource.path != res_path:
+                logging.warning('Could not acquire resource {0}, name is used '
+                                'by another resource'.format(res_name))
+                return None
+            resource.references += 1
+            return resource
+
+        resource = self.load_resource(res_name, res_path, res_type,
+                                      **optional)
+        if resource is None:
+            return None
+        resource.acquired = True
+        resource.references = 1
+        return resource
+
     def activate_bundle(self, bundle_name):
         bundle = self.outline.bundles.get(bundle_name)
         for resource_name in bundle.resources:
@@ -48,25 +95,28 @@ class ResourceManager(object):
         self.bundles.remove(bundle)
 
     def add_resource(self, resource):
-        if resource.name in self.resources:
-            logging.log('[WARN] Overwriting resource %s' % resource.name)
+        previous = self.resources.get(resource.name)
+        if previous is not None:
+            logging.warning('Overwriting resource %s' % resource.name)
+            self._unindex(previous)
         self.resources[resource.name] = resource
-        return self.resources[resource.name]
+        self._index(resource)
+        return resource
 
     def bind_outline(self, outline_path):
         self.outline = ResourceOutline.process(outline_path)
 
     def clear(self):
         self.outline = None
+        for resource in self.resources.values():
+            resource._managers.remove(self)
         self.resources.clear()
         self.bundles.clear()
+        self._paths.clear()
+        self._groups.clear()
 
     def get_group(self, group_name):
-        results = []
-        for resource in self.resources.values():
-            if resource.member_of(group_name):
-                results.append(resource)
-        return results
+        return list(self._groups.get(group_name, {}).values())
 
     def get_resource(self, res_tag):
         """Get a resource by tag (name or path)."""
@@ -82,9 +132,9 @@ class ResourceManager(object):
         return None
 
     def get_resource_by_path(self, res_path):
-        for resource in self.resources.values():
-            if resource.path == res_path:
-                return resource.data
+        resource = self._find_by_path(res_path)
+        if resource is not None:
+            return resource.data
         return None
 
     def load_outline(self):
@@ -123,31 +173,95 @@ class ResourceManager(object):
                 'Invalid resource provided to ResourceManager.load_resource\n' +
                 '\t{0}\n\t{1}\n\t{2}'.format(res_name, res_path, res_type))
 
+    def release_resource(self, res_tag):
+        """Release a reference to a resource (see acquire_resource).
+
+        Args:
+            res_tag (str): The name or path of the resource.
+
+        Returns:
+            bool: True if the last reference was released and the resource was
+                removed.
+        """
+        resource = self.resources.get(res_tag)
+        if resource is None or not resource.acquired:
+            acquired = [res for res in self._paths.get(res_tag, {}).values()
+                        if res.acquired]
+            if acquired:
+                resource = acquired[0]
+        if resource is None:
+            logging.warning('Attempted to release unknown resource ' +
+                            str(res_tag))
+            return False
+
+        if not resource.acquired or resource.references <= 0:
+            logging.warning('Attempted to release resource that was not '
+                            'acquired ' + str(res_tag))
+            return False
+
+        resource.references -= 1
+        if resource.references > 0:
+            return False
+        self.remove_resource_by_name(resource.name)
+        return True
+
     def remove_group(self, group_name):
-        # TODO better algorithm for this
-        remove_keys = []
-        for k, resource in self.resources.items():
-            if resource.member_of(group_name):
-                remove_keys.append(k)
-        for k in remove_keys:
-            del self.resources[k]
+        for resource in self.get_group(group_name):
+            self.remove_resource_by_name(resource.name)
 
     def remove_resource(self, res_tag):
         """Remove a resource by tag (name or path)."""
-        removed = self.resources.pop(res_tag, None)
+        removed = self.remove_resource_by_name(res_tag)
         if removed is None:
             removed = self.remove_resource_by_path(res_tag)
         return removed
 
     def remove_resource_by_name(self, res_name):
-        return self.resources.pop(res_name, None)
+        removed = self.resources.pop(res_name, None)
+        if removed is not None:
+            self._unindex(removed)
+        return removed
 
     def remove_resource_by_path(self, res_path):
-        for res_key, resource in self.resources.items():
-            if resource.path == res_path:
-                return self.resources.pop(res_path)
+        resource = self._find_by_path(res_path)
+        if resource is not None:
+            return self.remove_resource_by_name(resource.name)
         return None
 
+    def _find_by_path(self, res_path):
+        # The first resource added with res_path
+        resources = self._paths.get(res_path)
+        if resources:
+            return next(iter(resources.values()))
+        return None
+
+    def _detach(self, resource):
+        """Remove resource, if it is stored under its current name."""
+        if self.resources.get(resource.name) is resource:
+            self.remove_resource_by_name(resource.name)
+
+    def _index(self, resource):
+        if self not in resource._managers:
+            resource._managers.append(self)
+        self._paths.setdefault(resource.path, {})[resource.name] = resource
+        for group_name in resource.group:
+            self._groups.setdefault(group_name, {})[resource.name] = resource
+
+    def _unindex(self, resource):
+        if self in resource._managers:
+            resource._managers.remove(self)
+        _discard(self._paths, resource.path, resource.name)
+        for group_name in resource.group:
+            _discard(self._groups, group_name, resource.name)
+
+
+def _discard(index, key, res_name):
+    resources = index.get(key)
+    if resources is not None:
+        resources.pop(res_name, None)
+        if not resources:
+            del index[key]
+
 
 class ResourceBundle(object):
     def __init__(self, bundle_name, resource_names):
@@ -157,10 +271,16 @@ class ResourceBundle(object):
 
 class Resource(object):
     def __init__(self, name, data, path=''):
-        self.name = name
+        self._managers = []  # Every ResourceManager holding this resource
+        self.__name = name
+        self.__path = path
+        self.__group = []
         self.data = data
-        self.path = path
-        self.group = ''
+
+        # Set by ResourceManager.acquire_resource, which shares and removes
+        # only the resources it loaded itself
+        self.acquired = False
+        self.references = 0
 
     @property
     def group(self):
@@ -168,7 +288,32 @@ class Resource(object):
 
     @group.setter
     def group(self, group_string):
-        self.__group = group_string.split()
+        self.__reindex('_Resource__group', group_string.split())
+
+    @property
+    def name(self):
+        return self.__name
+
+    @name.setter
+    def name(self, name):
+        self.__reindex('_Resource__name', name)
+
+    @property
+    def path(self):
+        return self.__path
+
+    @path.setter
+    def path(self, path):
+        self.__reindex('_Resource__path', path)
+
+    def __reindex(self, attribute, value):
+        # Keep the indexes of every manager holding this resource up to date
+        managers = list(self._managers)
+        for manager in managers:
+            manager._detach(self)
+        setattr(self, attribute, value)
+        for manager in managers:
+            manager.add_resource(self)
 
     def member_of(self, group):
         return group in self.__group
@@ -5,31 +5,226 @@ Modules for loading and handling stages. Uses pytmx for tiled stages and a
 generic StageData model for custom loaders.
 """
 
+import array
+import base64
+import gzip
+import itertools
+import json
 import logging
+import mmap
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from xml.etree import ElementTree
+
 import peachy
+import peachy.resources
+import pygame
 import pytmx
+import pytmx.util_pygame
+
+"""Suggested width and height, in pixels, of the surfaces static tile layers
+are pre-rendered onto. See ChunkedLayer and load_tiled_tmx()."""
+CHUNK_SIZE = 256
+
+"""Default width and height, in pixels, of the regions a StreamingStage is
+divided into, and the amount of bytes of regions it keeps loaded."""
+REGION_SIZE = 1024
+REGION_MEMORY_BUDGET = 64 * 1024 * 1024
+
+"""Stage cache file format. See load_stage()."""
+STAGE_CACHE_EXTENSION = '.cache'
+STAGE_CACHE_MAGIC = b'PCHSTAGE'
+STAGE_CACHE_VERSION = 1
+
+# Magic, version, length of the JSON header that follows
+_STAGE_CACHE_HEADER = struct.Struct('<8sII')
+
+
+def load_stage(path, cache=True):
+    """Load a tiled TMX file into StageData.
+
+    Faster alternative to load_tiled_tmx. The TMX is parsed without loading any
+    images, and the gids of every tile layer are stored in arrays (see
+    StageData.StageLayer). Infinite maps and object layers are not supported.
+    Use load_tileset_images() to load the images required to render the stage.
+
+    Unless disabled, a binary cache is written next to the TMX file (path +
+    STAGE_CACHE_EXTENSION). Subsequent loads read the cache instead of parsing
+    XML, as long as the TMX file and its external tilesets are unchanged. The
+    cache is memory-mapped, gids are read directly out of the file.
+
+    Args:
+        path (str): Path to the tiled TMX resource.
+        cache (bool, optional): Read and write the binary cache.
+
+    Returns:
+        StageData: The loaded stage.
+    """
+    cache_path = path + STAGE_CACHE_EXTENSION
+
+    if cache:
+        stage = _read_stage_cache(cache_path)
+        if stage is not None:
+            return stage
+
+    stage, sources = _parse_tmx(path)
+
+    if cache:
+        try:
+            _write_stage_cache(cache_path, stage, sources)
+        except (IOError, OSError):
+            logging.warning('Could not write stage cache ' + cache_path)
+    return stage
+
+
+def load_tileset_images(stage, resources=None):
+    """Load the tileset images of a StageData.
+
+    Tiles are subsurfaces of their tileset's image. Fills stage.tileset_images
+    with the image of each tileset, and stage.images with the image of each gid
+    (in the same form as pytmx.TiledMap.images).
+
+    By default, images belong to the stage and are freed along with it. If
+    resources is specified, images are acquired from it instead (see
+    ResourceManager.acquire_resource), so a tileset shared by several stages
+    is only loaded once. Shared images stay loaded until
+    unload_stage(stage, resources) is called.
+
+    Args:
+        stage (StageData): The stage to load images for.
+        resources (ResourceManager, optional): Share images through this
+            ResourceManager.
+    """
+    if resources is None:
+        resources = peachy.resources.ResourceManager()
+
+    stage.images = _TileImages()
+    del stage.tileset_images[:]
+
+    for tileset in stage.tilesets:
+        if tileset.image is None:
+            continue
+
+        image = _acquire_image(stage, resources, tileset.image, tileset.trans)
+        if image is None:
+            continue
+        stage.tileset_images.append(image)
+
+        columns = tileset.columns
+        if not columns:
+            columns = (image.get_width() - tileset.margin * 2 +
+                       tileset.spacing) // (tileset.tilewidth +
+                                            tileset.spacing)
+        count = tileset.tilecount
+        if not count and columns:
+            count = columns * ((image.get_height() - tileset.margin * 2 +
+                                tileset.spacing) // (tileset.tileheight +
+                                                     tileset.spacing))
 
+        for index in range(count):
+            x = tileset.margin + (index % columns) * (tileset.tilewidth +
+                                                      tileset.spacing)
+            y = tileset.margin + (index // columns) * (tileset.tileheight +
+                                                       tileset.spacing)
+            try:
+                stage.images[tileset.firstgid + index] = image.subsurface(
+                    (x, y, tileset.tilewidth, tileset.tileheight))
+            except ValueError:
+                logging.warning('Tile outside of tileset image ' +
+                                tileset.image)
+                break
 
-def load_tiled_tmx(path):
+
+def unload_stage(stage, resources=None):
+    """Release every image loaded for a stage.
+
+    Shared images are removed from resources once no other stage uses them, so
+    switching between stages sharing tilesets only loads the difference.
+
+    Args:
+        stage (pytmx.TiledMap, StageData): A stage loaded by load_tiled_tmx or
+            load_tileset_images.
+        resources (ResourceManager, optional): The ResourceManager the images
+            were shared through, if any.
+    """
+    if resources is not None:
+        for name in getattr(stage, 'resource_names', []):
+            resources.release_resource(name)
+    stage.resource_names = []
+
+    if isinstance(stage, StageData):
+        stage.images = _TileImages()
+        del stage.tileset_images[:]
+
+
+def load_tiled_tmx(path, chunk_size=None, resources=None):
     """Load a tiled TMX file.
 
     Loads a tiled TMX map using pytmx, and returns a pytmx.TiledMap. Also:
     appends layer_type(str) to pytmx layers, to make parsing simpler.
 
+    Images are loaded through peachy.fs. By default they belong to the map and
+    are freed along with it. If resources is specified, images are shared with
+    every other stage loaded into it instead, and stay loaded until
+    unload_stage(map, resources) is called. Every map loaded this way must be
+    unloaded once it is no longer used.
+
+    If chunk_size is specified, tile layers are pre-rendered into chunks (see
+    ChunkedLayer) stored as layer.chunks, unless the layer has a "static"
+    property set to false. Chunks trade memory for render time: each one is a
+    per-pixel alpha surface, so a layer costs roughly 4 bytes per pixel of the
+    map (a 200x200 map of 32px tiles takes about 160MB per layer). Otherwise
+    layer.chunks is None and tiles are drawn individually.
+    Animated tiles are advanced by a TileAnimator stored as map.animator; call
+    map.animator.update(elapsed) with the milliseconds elapsed, such as once
+    per update with 1000 / config.UPDATES_PER_SECOND.
+
     Args:
         path (str): Absolute path to the tiled TMX resource.
+        chunk_size (int, optional): The size of each chunk in pixels, such as
+            CHUNK_SIZE. Tile layers are not pre-rendered by default.
+        resources (ResourceManager, optional): Share images through this
+            ResourceManager.
 
     Returns:
         pytmx.TiledMap: A reference to the loaded tiled map.
-
-    Todo:
-        Custom image loading that utilizes peachy.fs.load_image.
     """
-    tiled_map = pytmx.util_pygame.load_pygame(path)
+    shared = resources
+    if resources is None:
+        resources = peachy.resources.ResourceManager()
+
+    # pytmx calls the image loader before the map is returned
+    loaded = StageData()
+
+    def image_loader(filename, colorkey, **kwargs):
+        image = _acquire_image(loaded, resources, filename, colorkey)
+
+        def load_image(rect=None, flags=None):
+            tile = image.subsurface(rect) if rect else image
+            if flags:
+                tile = pytmx.util_pygame.handle_transformation(tile, flags)
+            return tile
+        return load_image
+
+    try:
+        tiled_map = pytmx.TiledMap(path, image_loader=image_loader)
+    except Exception:
+        unload_stage(loaded, shared)
+        raise
+    tiled_map.resource_names = loaded.resource_names
+    tiled_map.animator = TileAnimator(tiled_map)
 
     for layer in tiled_map.layers:
         if isinstance(layer, pytmx.TiledTileLayer):
             layer.layer_type = 'tile'
+            layer.chunks = None
+            if chunk_size and _is_static(layer):
+                layer.chunks = ChunkedLayer(tiled_map, layer, chunk_size)
         elif isinstance(layer, pytmx.TiledObjectGroup):
             layer.layer_type = 'object group'
         elif isinstance(layer, pytmx.TiledImageLayer):
@@ -38,28 +233,36 @@ def load_tiled_tmx(path):
     return tiled_map
 
 
-def render_tiled_map(stage):
+def render_tiled_map(stage, view=None):
     """Convenience function for rendering all layers in a tiled map.
 
     Args:
         stage(pytmx.TiledMap): A stage file
+        view(pygame.Rect, peachy.etc.Camera, optional): The region to render,
+            see render_tiled_layer.
     """
     for layer in stage.layers:
         if isinstance(layer, pytmx.TiledTileLayer):
-            render_tiled_layer(layer)
+            render_tiled_layer(stage, layer, view)
 
 
-def render_tiled_layer(stage, layer):
+def render_tiled_layer(stage, layer, view=None):
     """Render a single layer by providing reference or layer name.
 
+    Only tiles inside of view are rendered. Layers pre-rendered into chunks
+    (see load_tiled_tmx) only draw the chunks inside of view. Otherwise, only
+    the range of tiles covering view is visited, so the cost of rendering
+    depends on the size of the view rather than the size of the layer.
+
     Args:
         stage(pytmx.TiledMap, StageData): A stage object, pytmx or StageData.
         layer(pytmx.TiledTileLayer, StageLayer, str): A stage layer object,
             pytmx or StageLayer. Can also specify a string name and this
             function will find the layer with said name.
-
-    Todo:
-        Tile animations.
+        view(pygame.Rect, peachy.etc.Camera, optional): The region to render,
+            in pixels. Accepts a rect or any object with x, y, width and height
+            (such as a Camera). Defaults to the region visible within the
+            current graphics context (see peachy.graphics.view).
     """
 
     if type(layer) == str:
@@ -70,13 +273,809 @@ def render_tiled_layer(stage, layer):
         else:
             layer = None
 
+    view = _view_rect(view)
+
+    chunks = getattr(layer, 'chunks', None)
+    if chunks is not None:
+        chunks.render(view)
+        return
+
     try:
+        tile_width, tile_height = _tile_size(stage)
+        for x, y, image in _visible_tiles(stage, layer, view):
+            peachy.graphics.draw(image, x * tile_width, y * tile_height)
+    except AttributeError:
+        logging.warning('Layer could not be rendered ' + str(layer))
+
+
+def _is_static(layer):
+    static = getattr(layer, 'properties', {}).get('static', True)
+    return str(static).lower() not in ('false', '0')
+
+
+def _view_rect(view):
+    if view is None:
+        return peachy.graphics.view()
+    try:
+        return pygame.Rect(view)
+    except TypeError:
+        return pygame.Rect(view.x, view.y, view.width, view.height)
+
+
+def _visible_tiles(stage, layer, view):
+    """Yield (x, y, image) of every tile in layer that may overlap view."""
+    tile_width, tile_height = _tile_size(stage)
+
+    # Tiles may be larger than the grid and reach into view from above/left
+    max_width, max_height = _max_tile_size(stage)
+
+    left = (view.left - max_width) // tile_width + 1
+    top = (view.top - max_height) // tile_height + 1
+    right = (view.right - 1) // tile_width
+    bottom = (view.bottom - 1) // tile_height
+
+    data = getattr(layer, 'data', None)
+    images = getattr(stage, 'images', None)
+    animator = getattr(stage, 'animator', None)
+    frames = animator.frames if animator is not None else {}
+
+    if data is None or images is None:
+        # Unknown layer, filter every tile
         for x, y, image in layer.tiles():
-            if image:
-                peachy.graphics.draw(image, x * stage.tilewidth,
-                                     y * stage.tileheight)
+            if image and left <= x <= right and top <= y <= bottom:
+                yield x, y, image
+        return
+
+    left = max(left, 0)
+    top = max(top, 0)
+    right = min(right, layer.width - 1)
+    bottom = min(bottom, layer.height - 1)
+
+    for y in range(top, bottom + 1):
+        row = data[y]
+        for x in range(left, right + 1):
+            gid = row[x]
+            if gid:
+                image = images[frames.get(gid, gid)]
+                if image:
+                    yield x, y, image
+
+
+def _acquire_image(stage, resources, path, colorkey=None):
+    # The colorkey is applied to the shared image, so images with different
+    # colorkeys are shared under different names
+    path = os.path.abspath(path)
+    name = path
+    if colorkey:
+        colorkey = pygame.Color('#' + colorkey.lstrip('#'))
+        name = '{0}#{1:02x}{2:02x}{3:02x}'.format(path, *colorkey[:3])
+
+    resource = resources.acquire_resource(
+        path, peachy.resources.ResourceType.IMAGE, name)
+    if resource is None:
+        return None
+    stage.resource_names.append(resource.name)
+
+    if colorkey and resource.references == 1:
+        resource.data.set_colorkey(colorkey)
+    return resource.data
+
+
+def _modified_time(path):
+    return os.stat(path).st_mtime_ns
+
+
+def _parse_layer_data(data, width, height):
+    encoding = data.get('encoding')
+    compression = data.get('compression')
+
+    if data.find('chunk') is not None:
+        raise ValueError('Infinite maps are not supported')
+
+    if encoding == 'csv':
+        gids = array.array('I', (int(gid) for gid in data.text.split(',')))
+    elif encoding == 'base64':
+        raw = base64.b64decode(data.text.strip())
+        if compression == 'zlib':
+            raw = zlib.decompress(raw)
+        elif compression == 'gzip':
+            raw = gzip.decompress(raw)
+        elif compression:
+            raise ValueError('Unsupported compression ' + compression)
+        gids = array.array('I')
+        gids.frombytes(raw)
+        if sys.byteorder != 'little':
+            gids.byteswap()
+    else:
+        gids = array.array('I', (int(tile.get('gid', 0))
+                                 for tile in data.findall('tile')))
+
+    if len(gids) != width * height:
+        raise ValueError('Layer data does not match layer size')
+    return gids
+
+
+def _parse_properties(element):
+    properties = {}
+    if element is not None:
+        for prop in element.findall('property'):
+            properties[prop.get('name')] = prop.get('value', prop.text)
+    return properties
+
+
+def _parse_tmx(path):
+    """Parse a TMX file into StageData.
+
+    Returns:
+        tuple[StageData, dict[str, int]]: The stage and the modification time
+            of every file read (the TMX and external tilesets).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    sources = {os.path.abspath(path): _modified_time(path)}
+    root = ElementTree.parse(path).getroot()
+
+    stage = StageData()
+    stage.name = os.path.splitext(os.path.basename(path))[0]
+    stage.path = path
+    stage.width = int(root.get('width'))
+    stage.height = int(root.get('height'))
+    stage.tile_width = int(root.get('tilewidth'))
+    stage.tile_height = int(root.get('tileheight'))
+    stage.background_color = root.get('backgroundcolor', '')
+    stage.properties = _parse_properties(root.find('properties'))
+
+    for element in root.findall('tileset'):
+        firstgid = int(element.get('firstgid'))
+        tileset_directory = directory
+        if element.get('source'):
+            source = os.path.join(directory, element.get('source'))
+            sources[os.path.abspath(source)] = _modified_time(source)
+            tileset_directory = os.path.dirname(os.path.abspath(source))
+            element = ElementTree.parse(source).getroot()
+
+        tileset = StageData.StageTileset()
+        tileset.name = element.get('name', '')
+        tileset.firstgid = firstgid
+        tileset.tilewidth = int(element.get('tilewidth'))
+        tileset.tileheight = int(element.get('tileheight'))
+        tileset.spacing = int(element.get('spacing', 0))
+        tileset.margin = int(element.get('margin', 0))
+        tileset.tilecount = int(element.get('tilecount', 0))
+        tileset.columns = int(element.get('columns', 0))
+
+        image = element.find('image')
+        if image is not None:
+            tileset.image = os.path.join(tileset_directory,
+                                         image.get('source'))
+            tileset.trans = image.get('trans')
+        stage.tilesets.append(tileset)
+
+    for element in root.findall('layer'):
+        layer = StageData.StageLayer()
+        layer.name = element.get('name', '')
+        layer.visible = element.get('visible', '1') != '0'
+        layer.properties = _parse_properties(element.find('properties'))
+
+        width = int(element.get('width'))
+        height = int(element.get('height'))
+        layer.set_gids(_parse_layer_data(element.find('data'), width, height),
+                       width, height)
+        stage.layers.append(layer)
+
+    return stage, sources
+
+
+def _read_stage_cache(cache_path):
+    """Load StageData from a binary cache, or None if it is missing or out of
+    date.
+    """
+    try:
+        with open(cache_path, 'rb') as cache_file:
+            mapped = mmap.mmap(cache_file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+    except (IOError, OSError, ValueError):
+        return None
+
+    try:
+        header = _read_stage_cache_header(mapped)
+    except (struct.error, ValueError, KeyError, TypeError, IOError, OSError):
+        header = None
+    if header is None:
+        mapped.close()
+        return None
+
+    stage = StageData()
+    for name, value in header['stage'].items():
+        setattr(stage, name, value)
+
+    for fields in header['tilesets']:
+        tileset = StageData.StageTileset()
+        tileset.__dict__.update(fields)
+        stage.tilesets.append(tileset)
+
+    view = memoryview(mapped)
+    for fields in header['layers']:
+        layer = StageData.StageLayer()
+        offset = fields.pop('offset')
+        width = fields.pop('width')
+        height = fields.pop('height')
+        layer.__dict__.update(fields)
+
+        data = view[offset:offset + width * height * 4]
+        if sys.byteorder == 'little':
+            gids = data.cast('I')
+        else:
+            gids = array.array('I', data.tobytes())
+            gids.byteswap()
+        layer.set_gids(gids, width, height)
+        stage.layers.append(layer)
+
+    return stage
+
+
+def _read_stage_cache_header(mapped):
+    """Read the JSON header of a stage cache, or None if the cache is out of
+    date or does not hold every layer it describes.
+    """
+    magic, version, length = _STAGE_CACHE_HEADER.unpack_from(mapped)
+    if magic != STAGE_CACHE_MAGIC or version != STAGE_CACHE_VERSION:
+        return None
+    start = _STAGE_CACHE_HEADER.size
+    if start + length > len(mapped):
+        return None
+    header = json.loads(mapped[start:start + length].decode('utf-8'))
+
+    for source, modified in header['sources'].items():
+        if _modified_time(source) != modified:
+            return None
+
+    for fields in header['layers']:
+        offset = fields['offset']
+        size = fields['width'] * fields['height'] * 4
+        if offset < start + length or offset % 4 or \
+                offset + size > len(mapped):
+            return None
+    return header
+
+
+def _write_stage_cache(cache_path, stage, sources):
+    stage_fields = dict((name, getattr(stage, name)) for name in (
+        'name', 'path', 'width', 'height', 'tile_width', 'tile_height',
+        'background_color', 'properties'))
+    header = {
+        'sources': sources,
+        'stage': stage_fields,
+        'tilesets': [tileset.__dict__ for tileset in stage.tilesets],
+        'layers': []
+    }
+
+    for layer in stage.layers:
+        fields = dict((name, value) for name, value in layer.__dict__.items()
+                      if name not in ('gids', 'data', 'tiles'))
+        header['layers'].append(fields)
+
+    # Layer offsets depend on the size of the header, which depends on the
+    # offsets. Grow the header until both agree.
+    start = 0
+    while True:
+        offset = start
+        for fields, layer in zip(header['layers'], stage.layers):
+            fields['offset'] = offset
+            offset += len(layer.gids) * 4
+
+        encoded = json.dumps(header).encode('utf-8')
+        required = _STAGE_CACHE_HEADER.size + len(encoded)
+        required += -required % 4  # Align gids to 4 bytes
+        if required <= start:
+            break
+        start = required
+
+    encoded += b' ' * (start - _STAGE_CACHE_HEADER.size - len(encoded))
+
+    # Stages loaded earlier may still be reading gids out of the existing
+    # cache, so it is replaced rather than overwritten. Writing to a temporary
+    # file also keeps a failed write from leaving a truncated cache behind.
+    directory, name = os.path.split(os.path.abspath(cache_path))
+    handle, temporary_path = tempfile.mkstemp(prefix=name, dir=directory)
+    try:
+        with os.fdopen(handle, 'wb') as cache_file:
+            cache_file.write(_STAGE_CACHE_HEADER.pack(
+                STAGE_CACHE_MAGIC, STAGE_CACHE_VERSION, len(encoded)))
+            cache_file.write(encoded)
+            for layer in stage.layers:
+                gids = array.array('I', layer.gids)
+                if sys.byteorder != 'little':
+                    gids.byteswap()
+                cache_file.write(gids.tobytes())
+        os.replace(temporary_path, cache_path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+def _max_tile_size(stage):
+    max_width, max_height = _tile_size(stage)
+    for tileset in getattr(stage, 'tilesets', []):
+        max_width = max(max_width, getattr(tileset, 'tilewidth', 0))
+        max_height = max(max_height, getattr(tileset, 'tileheight', 0))
+    return max_width, max_height
+
+
+def _surface_memory(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def _tile_size(stage):
+    try:
+        return stage.tilewidth, stage.tileheight
     except AttributeError:
-        logging.warning('Layer could not be rendered ' + layer)
+        return stage.tile_width, stage.tile_height
+
+
+class ChunkedLayer(object):
+    """A tile layer pre-rendered onto chunk surfaces.
+
+    Every tile is drawn once onto square surfaces (chunks) of chunk_size
+    pixels. Rendering then only draws the chunks visible, reducing a large map
+    from one draw call per tile to a handful per frame. Tiles changed after
+    creation are not displayed until bake() is called.
+
+    Animated tiles (see TileAnimator) are supported for layers providing data
+    in the form of pytmx.TiledTileLayer. A chunk is only re-rendered when it is
+    visible and the frame of an animated tile inside of it has changed.
+
+    Attributes:
+        stage (pytmx.TiledMap, StageData): The stage the layer belongs to.
+        layer (pytmx.TiledTileLayer): The layer rendered. Any layer providing
+            tiles() in the form of (x, y, image) is supported.
+        chunk_size (int): The width and height of each chunk in pixels.
+        chunks (dict[tuple[int, int], pygame.Surface]): Chunk surfaces keyed
+            by chunk coordinates. Chunks without tiles are omitted.
+    """
+
+    def __init__(self, stage, layer, chunk_size=CHUNK_SIZE):
+        self.stage = stage
+        self.layer = layer
+        self.chunk_size = chunk_size
+        self.chunks = {}
+
+        # Animated gids inside of each chunk and the frames they were last
+        # rendered with, keyed by chunk coordinates
+        self._animated = {}
+        self._baked_frames = {}
+
+        self.bake()
+
+    def bake(self):
+        """Pre-render every tile of the layer onto chunks."""
+        self.chunks.clear()
+        size = self.chunk_size
+        tile_width, tile_height = _tile_size(self.stage)
+
+        for x, y, image in self.layer.tiles():
+            if not image:
+                continue
+
+            left = x * tile_width
+            top = y * tile_height
+            right = left + image.get_width()
+            bottom = top + image.get_height()
+
+            # Tiles may be larger than the grid and overlap several chunks
+            for chunk_x in range(left // size, (right - 1) // size + 1):
+                for chunk_y in range(top // size, (bottom - 1) // size + 1):
+                    chunk = self.chunks.get((chunk_x, chunk_y))
+                    if chunk is None:
+                        chunk = pygame.Surface((size, size), pygame.SRCALPHA)
+                        self.chunks[(chunk_x, chunk_y)] = chunk
+                    chunk.blit(image, (left - chunk_x * size,
+                                       top - chunk_y * size))
+
+        self._find_animated()
+
+    def render(self, view=None):
+        """Draw every chunk inside of view.
+
+        Args:
+            view (pygame.Rect, optional): The region to render, in pixels.
+                Defaults to the region visible within the current graphics
+                context.
+        """
+        size = self.chunk_size
+        if view is None:
+            view = peachy.graphics.view()
+
+        animator = getattr(self.stage, 'animator', None)
+
+        for chunk_y in range(view.top // size, (view.bottom - 1) // size + 1):
+            for chunk_x in range(view.left // size,
+                                 (view.right - 1) // size + 1):
+                key = (chunk_x, chunk_y)
+                chunk = self.chunks.get(key)
+                if chunk is None:
+                    continue
+
+                gids = self._animated.get(key)
+                if gids and animator is not None:
+                    frames = tuple(animator.frames.get(gid, gid)
+                                   for gid in gids)
+                    if frames != self._baked_frames[key]:
+                        self._bake_chunk(key)
+                        self._baked_frames[key] = frames
+
+                peachy.graphics.draw(chunk, chunk_x * size, chunk_y * size)
+
+    def _bake_chunk(self, key):
+        size = self.chunk_size
+        tile_width, tile_height = _tile_size(self.stage)
+        bounds = pygame.Rect(key[0] * size, key[1] * size, size, size)
+
+        chunk = self.chunks[key]
+        chunk.fill((0, 0, 0, 0))
+        for x, y, image in _visible_tiles(self.stage, self.layer, bounds):
+            chunk.blit(image, (x * tile_width - bounds.x,
+                               y * tile_height - bounds.y))
+
+    def _find_animated(self):
+        # Record the chunks every animated tile may cover
+        self._animated.clear()
+        self._baked_frames.clear()
+
+        animator = getattr(self.stage, 'animator', None)
+        data = getattr(self.layer, 'data', None)
+        if animator is None or not animator.animations or data is None:
+            return
+
+        size = self.chunk_size
+        tile_width, tile_height = _tile_size(self.stage)
+        max_width, max_height = _max_tile_size(self.stage)
+
+        animated = {}
+        for y, row in enumerate(data):
+            for x, gid in enumerate(row):
+                if gid not in animator.animations:
+                    continue
+                left = x * tile_width
+                top = y * tile_height
+                for chunk_x in range(left // size,
+                                     (left + max_width - 1) // size + 1):
+                    for chunk_y in range(top // size,
+                                         (top + max_height - 1) // size + 1):
+                        if (chunk_x, chunk_y) in self.chunks:
+                            animated.setdefault((chunk_x, chunk_y),
+                                                set()).add(gid)
+
+        for key, gids in animated.items():
+            self._animated[key] = tuple(gids)
+            # Chunks were rendered using the tiles' own images
+            self._baked_frames[key] = tuple(gids)
+
+
+class StreamingStage(object):
+    """Renders a stage region by region, loading regions in the background.
+
+    The stage is divided into square regions of region_size pixels. Each tile
+    layer of a region is pre-rendered onto its own surface (as in
+    ChunkedLayer), but only for regions near the view. Call update() with the
+    view every frame: the gids of regions within preload pixels of it are read
+    on a background thread, and rendered onto surfaces during a later update().
+    The regions farthest from the view are evicted once the surfaces loaded
+    exceed memory_budget bytes. Regions within preload pixels of the view are
+    never evicted; if they alone exceed the budget, only the regions inside of
+    the view are loaded until they fit again.
+
+    Surfaces are only ever created and drawn onto by the thread calling
+    update() and render(), as pygame surfaces are not thread-safe. Combined
+    with load_stage(), whose gids are read out of a memory-mapped cache, only
+    the regions around the view are ever held in memory.
+
+    Regions are rendered with the frame each animated tile (see TileAnimator)
+    displays at the time, and do not animate afterwards. Render animated
+    layers with render_tiled_layer() instead (see the layer argument of
+    render()).
+
+    Example:
+        >>> stage = peachy.stage.load_stage(path)
+        >>> peachy.stage.load_tileset_images(stage)
+        >>> streaming = peachy.stage.StreamingStage(stage)
+        >>> # Every frame
+        >>> streaming.update(camera)
+        >>> streaming.render(camera)
+
+    Attributes:
+        stage (StageData, pytmx.TiledMap): The stage rendered. Its images
+            must be loaded (see load_tileset_images).
+        region_size (int): The width and height of each region in pixels.
+        memory_budget (int): The amount of bytes of surfaces kept loaded.
+            Regions within preload pixels of the view are kept regardless.
+        preload (int): The distance, in pixels, around the view that regions
+            are loaded within.
+        threaded (bool): Read regions on a background thread. If disabled,
+            update() loads every region near the view immediately.
+        regions (dict[tuple[int, int], dict[int, pygame.Surface]]): The
+            surfaces of every loaded region keyed by region coordinates, and
+            then by layer index. Layers without tiles in a region are omitted.
+        memory (int): The amount of bytes of surfaces currently loaded.
+    """
+
+    def __init__(self, stage, region_size=REGION_SIZE,
+                 memory_budget=REGION_MEMORY_BUDGET, preload=None,
+                 threaded=True):
+        self.stage = stage
+        self.region_size = region_size
+        self.memory_budget = memory_budget
+        self.preload = region_size if preload is None else preload
+        self.threaded = threaded
+        self.regions = {}
+        self.memory = 0
+
+        # Regions requested from the worker thread, and the gids it has read
+        # for them. Both are shared with the worker, guarded by _lock.
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._decoded = {}
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._thread = None
+
+        # Are the regions near the view alone over memory_budget? Warned about
+        # once each time the budget is exceeded.
+        self._over_budget = False
+
+    def close(self):
+        """Stop loading regions in the background."""
+        if self._thread is not None:
+            with self._lock:
+                self._pending.clear()
+                self._decoded.clear()
+            self._queue.put((-1, next(self._order), None))
+            self._thread.join()
+            self._thread = None
+
+    def load_region(self, key):
+        """Load a region immediately, unless it is already loaded.
+
+        Args:
+            key (tuple[int, int]): The region coordinates.
+
+        Returns:
+            dict[int, pygame.Surface]: The surface of each layer in the region.
+        """
+        region = self.regions.get(key)
+        if region is None:
+            # Take the region from the worker, it skips regions not pending
+            with self._lock:
+                self._pending.discard(key)
+                decoded = self._decoded.pop(key, None)
+            if decoded is None:
+                decoded = self._decode_region(key)
+            region = self._store(key, self._render_region(key, decoded))
+        return region
+
+    def render(self, view=None, layer=None):
+        """Draw every region inside of view.
+
+        Regions inside of view that have not been loaded yet are loaded
+        immediately.
+
+        Args:
+            view (pygame.Rect, peachy.etc.Camera, optional): The region to
+                render, see render_tiled_layer.
+            layer (int, optional): Only render the layer at this index.
+        """
+        view = _view_rect(view)
+        size = self.region_size
+        keys = self._region_keys(view)
+
+        layers = range(len(self.stage.layers)) if layer is None else [layer]
+        for index in layers:
+            if not getattr(self.stage.layers[index], 'visible', True):
+                continue
+            for key in keys:
+                surface = self.load_region(key).get(index)
+                if surface is not None:
+                    peachy.graphics.draw(surface, key[0] * size,
+                                         key[1] * size)
+
+    def unload(self):
+        """Evict every region."""
+        with self._lock:
+            self._pending.clear()
+            self._decoded.clear()
+        self.regions.clear()
+        self.memory = 0
+
+    def update(self, view=None):
+        """Load the regions around view and evict those far from it.
+
+        Regions read by the background thread since the previous update are
+        rendered onto surfaces.
+
+        Args:
+            view (pygame.Rect, peachy.etc.Camera, optional): The region that
+                will be rendered, see render_tiled_layer.
+        """
+        view = _view_rect(view)
+        visible = set(self._region_keys(view))
+        nearby = self._region_keys(view.inflate(self.preload * 2,
+                                                self.preload * 2))
+
+        with self._lock:
+            decoded = self._decoded
+            self._decoded = {}
+            # Regions no longer nearby are no longer worth loading
+            self._pending.intersection_update(nearby)
+
+        for key, region in decoded.items():
+            if key in nearby:
+                self._store(key, self._render_region(key, region))
+
+        # Evict the farthest regions until within budget. Regions near the
+        # view are kept, they would only be requested again right away.
+        if self.memory > self.memory_budget:
+            keep = set(nearby)
+            loaded = sorted(self.regions,
+                            key=lambda key: self._distance(key, view),
+                            reverse=True)
+            for key in loaded:
+                if self.memory <= self.memory_budget:
+                    break
+                if key not in keep:
+                    self._evict(key)
+
+        # Too small a budget for every region near the view, shrink the
+        # distance regions are loaded within to the view itself
+        over_budget = self.memory > self.memory_budget
+        if over_budget:
+            if not self._over_budget:
+                logging.warning('StreamingStage memory_budget exceeded by the '
+                                'regions near the view, consider raising it '
+                                'or lowering preload')
+            nearby = [key for key in nearby if key in visible]
+        self._over_budget = over_budget
+
+        if self.threaded:
+            with self._lock:
+                for key in nearby:
+                    if key in self.regions or key in self._pending or \
+                            key in self._decoded:
+                        continue
+                    self._pending.add(key)
+                    self._queue.put((self._distance(key, view),
+                                     next(self._order), key))
+            if self._pending and self._thread is None:
+                self._thread = threading.Thread(target=self._work,
+                                                daemon=True)
+                self._thread.start()
+        else:
+            for key in nearby:
+                self.load_region(key)
+
+    def wait(self):
+        """Block until every region requested by update() has been read.
+
+        The regions are rendered during the next update().
+        """
+        if self._thread is not None:
+            self._queue.join()
+
+    def _decode_region(self, key):
+        """Read the gids of every tile layer that may overlap a region.
+
+        Does not touch any surface, so is safe to call from the worker thread.
+
+        Returns:
+            list[tuple[int, int, list]]: The layer index, the first column
+                read, and the rows read as (y, gids), for every tile layer.
+        """
+        size = self.region_size
+        tile_width, tile_height = _tile_size(self.stage)
+        max_width, max_height = _max_tile_size(self.stage)
+        bounds = pygame.Rect(key[0] * size, key[1] * size, size, size)
+
+        # Tiles may be larger than the grid and reach in from above/left
+        left = max((bounds.left - max_width) // tile_width + 1, 0)
+        top = max((bounds.top - max_height) // tile_height + 1, 0)
+
+        decoded = []
+        for index, layer in enumerate(self.stage.layers):
+            data = getattr(layer, 'data', None)
+            if data is None:
+                continue
+            right = min((bounds.right - 1) // tile_width, layer.width - 1)
+            bottom = min((bounds.bottom - 1) // tile_height, layer.height - 1)
+            rows = [(y, list(data[y][left:right + 1]))
+                    for y in range(top, bottom + 1)]
+            decoded.append((index, left, rows))
+        return decoded
+
+    def _distance(self, key, view):
+        size = self.region_size
+        dx = (key[0] + 0.5) * size - view.centerx
+        dy = (key[1] + 0.5) * size - view.centery
+        return dx * dx + dy * dy
+
+    def _evict(self, key):
+        for surface in self.regions.pop(key).values():
+            self.memory -= _surface_memory(surface)
+
+    def _region_keys(self, view):
+        size = self.region_size
+        width, height = _tile_size(self.stage)
+        right = min(view.right, self.stage.width * width)
+        bottom = min(view.bottom, self.stage.height * height)
+        return [(x, y)
+                for y in range(max(view.top, 0) // size,
+                               (bottom - 1) // size + 1)
+                for x in range(max(view.left, 0) // size,
+                               (right - 1) // size + 1)]
+
+    def _render_region(self, key, decoded):
+        size = self.region_size
+        tile_width, tile_height = _tile_size(self.stage)
+        origin_x = key[0] * size
+        origin_y = key[1] * size
+
+        images = self.stage.images
+        animator = getattr(self.stage, 'animator', None)
+        frames = animator.frames if animator is not None else {}
+
+        region = {}
+        for index, left, rows in decoded:
+            surface = None
+            for y, gids in rows:
+                for x, gid in enumerate(gids, left):
+                    if not gid:
+                        continue
+                    image = images[frames.get(gid, gid)]
+                    if not image:
+                        continue
+                    if surface is None:
+                        surface = pygame.Surface((size, size),
+                                                 pygame.SRCALPHA)
+                    surface.blit(image, (x * tile_width - origin_x,
+                                         y * tile_height - origin_y))
+            if surface is not None:
+                region[index] = surface
+        return region
+
+    def _store(self, key, region):
+        if key in self.regions:
+            return self.regions[key]
+        self.regions[key] = region
+        for surface in region.values():
+            self.memory += _surface_memory(surface)
+        return region
+
+    def _work(self):
+        while True:
+            _, _, key = self._queue.get()
+            try:
+                if key is None:
+                    return
+                with self._lock:
+                    if key not in self._pending:
+                        continue
+                decoded = self._decode_region(key)
+                with self._lock:
+                    if key in self._pending:
+                        self._pending.discard(key)
+                        self._decoded[key] = decoded
+            finally:
+                self._queue.task_done()
+
+
+class _TileImages(dict):
+    """Tile images of a StageData keyed by gid. Images of gids with flip flags
+    are created when first requested."""
+
+    def __missing__(self, raw_gid):
+        gid, flags = pytmx.pytmx.decode_gid(raw_gid)
+        image = self.get(gid)
+        if image is not None and gid != raw_gid:
+            image = pytmx.util_pygame.handle_transformation(image, flags)
+        self[raw_gid] = image
+        return image
 
 
 class StageData(object):
@@ -94,6 +1093,12 @@ class StageData(object):
         self.layers = []  # Cannot be dict, layers must remain in order
         self.tilesets = []
         self.tileset_images = []
+        self.properties = {}
+
+        # Images of each gid and the names of the resources they belong to,
+        # see load_tileset_images
+        self.images = _TileImages()
+        self.resource_names = []
 
         self.path = ''
 
@@ -102,18 +1107,56 @@ class StageData(object):
         del self.layers[:]
         del self.tilesets[:]
         del self.tileset_images[:]
+        self.images.clear()
 
     class StageLayer(object):
         """StageData Layer
 
+        Layers are filled either with a list of StageTile objects (tiles), or
+        with an array of gids (see set_gids).
+
         Attributes:
             name (str): Name of the layer
             tiles (list[StageData.StageTile]): A list containing all the tiles
                 that belong to this stage.
+            gids (array.array, memoryview): The gid of every tile, row by row.
+                None unless set_gids() is called.
+            data (list[memoryview]): Rows of gids indexed by [y][x], in the
+                same form as pytmx.TiledTileLayer.data. Views into gids.
+            width (int): The width of the layer in tiles.
+            height (int): The height of the layer in tiles.
+            visible (bool): Is the layer visible?
+            properties (dict): Custom properties of the layer.
         """
         def __init__(self):
             self.name = ''
             self.tiles = []
+            self.gids = None
+            self.data = None
+            self.width = 0
+            self.height = 0
+            self.visible = True
+            self.properties = {}
+
+        def get_gid(self, x, y):
+            """Get the gid of the tile at (x, y), in tiles."""
+            return self.gids[y * self.width + x]
+
+        def set_gids(self, gids, width, height):
+            """Fill the layer with an array of gids.
+
+            Args:
+                gids (array.array, memoryview): The gid of every tile, row by
+                    row. Must support the buffer protocol.
+                width (int): The width of the layer in tiles.
+                height (int): The height of the layer in tiles.
+            """
+            view = memoryview(gids)
+            self.gids = gids
+            self.width = width
+            self.height = height
+            self.data = [view[y * width:(y + 1) * width]
+                         for y in range(height)]
 
         def __repr__(self):
             return "<Stage Layer> " + self.name
@@ -143,9 +1186,81 @@ class StageData(object):
             firstgid (int): The starting global ID for this tileset.
             tilewidth (int): The width of an individual tile.
             tileheight (int): The height of an individual tile.
+            spacing (int): Pixels between tiles in the image.
+            margin (int): Pixels around the tiles in the image.
+            tilecount (int): The amount of tiles in the tileset.
+            columns (int): The amount of tiles per row in the image.
+            image (str): Path to the tileset image, or None.
+            trans (str): Hex color treated as transparent, or None.
         """
         def __init__(self):
             self.name = ''
             self.firstgid = 0
             self.tilewidth = 0
             self.tileheight = 0
+            self.spacing = 0
+            self.margin = 0
+            self.tilecount = 0
+            self.columns = 0
+            self.image = None
+            self.trans = None
+
+
+class TileAnimator(object):
+    """Advances every animated tile of a stage using a single clock.
+
+    Rather than tracking each tile, keeps a table of which frame (gid) is
+    displayed in place of each animated gid. Rendering looks tiles up through
+    this table. Animations are read from the "frames" tile property of a
+    pytmx.TiledMap.
+
+    Attributes:
+        animations (dict[int, list[tuple[int, int]]]): The frames of each
+            animated gid as (gid, duration in milliseconds).
+        frames (dict[int, int]): The gid currently displayed for each animated
+            gid.
+        time (float): Milliseconds elapsed.
+    """
+
+    def __init__(self, stage):
+        self.animations = {}
+        self.frames = {}
+        self.time = 0
+        self._lengths = {}
+
+        for gid, properties in getattr(stage, 'tile_properties', {}).items():
+            frames = (properties or {}).get('frames')
+            if frames:
+                self.animations[gid] = [(frame.gid, frame.duration)
+                                        for frame in frames]
+                self.frames[gid] = frames[0].gid
+                self._lengths[gid] = sum(frame.duration for frame in frames)
+
+    def update(self, elapsed):
+        """Advance the clock and update the frame of every animated gid.
+
+        Args:
+            elapsed (float): Milliseconds to advance by. When called from a
+                fixed update, this is 1000 / config.UPDATES_PER_SECOND.
+
+        Returns:
+            list[int]: Every animated gid whose frame changed.
+        """
+        self.time += elapsed
+
+        changed = []
+        for gid, animation in self.animations.items():
+            length = self._lengths[gid]
+            if length <= 0:
+                continue
+
+            remaining = self.time % length
+            for frame, duration in animation:
+                if remaining < duration:
+                    break
+                remaining -= duration
+
+            if self.frames[gid] != frame:
+                self.frames[gid] = frame
+                changed.append(gid)
+        return changed
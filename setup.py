@@ -46,5 +46,8 @@ setup(
     install_requires=[
         'pygame',
         'pytmx'
-    ]
+    ],
+    extras_require={
+        'numpy': ['numpy']
+    }
 )
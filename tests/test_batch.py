@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+import peachy
+import peachy.collision
+import peachy.geo
+
+numpy = pytest.importorskip('numpy')
+batch = pytest.importorskip('peachy.batch')
+
+
+def random_shapes(count, fields, seed):
+    rng = random.Random(seed)
+    return [tuple(rng.randint(-50, 150) if i < 2 else rng.randint(0, 60)
+                  for i in range(fields)) for _ in range(count)]
+
+
+def random_lines(count, seed):
+    rng = random.Random(seed)
+    return [tuple(rng.randint(-50, 150) for _ in range(4))
+            for _ in range(count)]
+
+
+@pytest.mark.parametrize('name, dtype_a, dtype_b', [
+    ('rect_rect', batch.RECT, batch.RECT),
+    ('rect_circle', batch.RECT, batch.CIRCLE),
+    ('rect_point', batch.RECT, batch.POINT),
+    ('circle_circle', batch.CIRCLE, batch.CIRCLE),
+    ('circle_point', batch.CIRCLE, batch.POINT),
+    ('line_line', batch.LINE, batch.LINE),
+])
+def test_matches_pairwise(name, dtype_a, dtype_b):
+    def make(dtype, seed):
+        if dtype is batch.LINE:
+            return random_lines(40, seed)
+        return random_shapes(40, len(dtype.names), seed)
+
+    shapes_a = make(dtype_a, 1)
+    shapes_b = make(dtype_b, 2)
+    scalar = getattr(peachy.collision, name)
+    vector = getattr(batch, name)
+
+    expected = [[scalar(a, b) for b in shapes_b] for a in shapes_a]
+    array_a = batch.to_array(shapes_a, dtype_a)
+    array_b = batch.to_array(shapes_b, dtype_b)
+
+    assert vector(array_a[:, None], array_b[None, :]).tolist() == expected
+    assert vector(shapes_a[0], array_b).tolist() == expected[0]
+
+    index_a, index_b = batch.pairs(vector, array_a, array_b)
+    assert sorted(zip(index_a.tolist(), index_b.tolist())) == \
+        [(i, j) for i in range(40) for j in range(40) if expected[i][j]]
+
+
+def test_pairs_unique():
+    rects = batch.to_array([peachy.geo.Rect(0, 0, 10, 10),
+                            peachy.geo.Rect(5, 5, 10, 10),
+                            peachy.geo.Rect(50, 50, 10, 10)], batch.RECT)
+    index_a, index_b = batch.pairs(batch.rect_rect, rects)
+
+    assert index_a.tolist() == [0]
+    assert index_b.tolist() == [1]
+
+
+class Particle(peachy.Entity, batch.StoredRect):
+    def __init__(self, x, y, vx=0, vy=0):
+        peachy.Entity.__init__(self)
+        batch.StoredRect.__init__(self, x, y, 2, 2, vx, vy)
+
+
+def test_component_store():
+    room = peachy.Room(None)
+    store = room.enable_component_store(capacity=2)
+    plain = room.add(peachy.Entity())
+    particles = [room.add(Particle(i * 10, 0, vx=i)) for i in range(4)]
+
+    assert len(store) == 4
+    assert store.x.tolist() == [0, 10, 20, 30]
+
+    store.integrate(ay=1)
+    assert particles[2].x == 22 and particles[2].y == 1
+    assert particles[2].vy == 1
+
+    particles[3].vx = 100
+    store.integrate()
+    store.clamp(0, 0, 50, 50, restitution=1)
+    assert particles[3].x == 48
+    assert particles[3].vx == -100
+
+    # Collision functions still work on stored entities
+    assert peachy.collision.rect_rect(particles[0], (0, 0, 5, 5))
+    assert batch.rect_rect(particles[0], store.to_rects()).tolist() == \
+        [True, False, False, False]
+
+    # Probes are detached from the store
+    probe = particles[0].at_point(100, 5)
+    assert probe.x == 100 and probe.vx == 0
+    assert particles[0].x == 0 and store.x[0] == 0
+
+    room.remove(particles[1])
+    room.remove(plain)
+    assert len(store) == 3
+    assert particles[1].x == 12 and particles[1].vx == 1
+    assert store.x.tolist() == [0, 48, 24]
+
+    room.disable_component_store()
+    assert particles[3].x == 48
+    particles[3].x = 0
+    assert particles[3].x == 0
@@ -1,6 +1,7 @@
 import peachy
 import peachy.collision
 import peachy.geo
+import peachy.stage
 
 
 class CircleEntity(peachy.Entity, peachy.geo.Circle):
@@ -215,3 +216,287 @@ def test_collide_groups():
     assert len(collision(room, 'group-a', circle_entity)) == 1
     assert len(collision(room, 'group-b', line_entity)) == 3
     assert len(collision(room, 'group-a', rect_entity)) == 0
+
+
+def test_spatial_hash():
+    room = peachy.Room(None)
+    spatial_hash = room.enable_spatial_hash(cell_size=32)
+
+    rect_entity = RectEntity(0, 0, 100, 100)
+    far_entity = RectEntity(500, 500, 10, 10)
+    room.add(rect_entity)
+    room.add(far_entity)
+    room.add(CircleEntity(0, 0, 50))
+    room.add(PointEntity(50, 50))
+    room.add(LineEntity(-50, 50, 50, 50))
+
+    assert len(spatial_hash) == 5
+    assert far_entity not in spatial_hash.query(0, 0, 100, 100)
+    assert len(peachy.collision.collides_multiple(room, rect_entity)) == 3
+
+    far_entity.x = 50
+    far_entity.y = 50
+    spatial_hash.update(far_entity)
+    assert len(peachy.collision.collides_multiple(room, rect_entity)) == 4
+
+    room.remove(far_entity)
+    assert far_entity not in spatial_hash
+    assert len(peachy.collision.collides_multiple(room, rect_entity)) == 3
+
+
+def test_spatial_hash_solid():
+    room = peachy.Room(None)
+    room.enable_spatial_hash(cell_size=16)
+
+    wall = RectEntity(100, 0, 10, 100)
+    wall.solid = True
+    mover = RectEntity(0, 0, 10, 10)
+    room.add(wall)
+    room.add(mover)
+
+    collision = peachy.collision.collides_solid
+    assert not collision(room, mover)
+    assert not collision(room, mover.at_point(x=90))
+    assert len(collision(room, mover.at_point(x=95))) == 1
+
+    # Entities are re-bucketed after their update
+    mover.update = lambda: setattr(mover, 'x', 95)
+    room.update()
+    assert len(collision(room, mover)) == 1
+
+    room.clear()
+    assert len(room.spatial_hash) == 0
+
+
+def test_polygon():
+    triangle = peachy.geo.Polygon([(0, 0), (100, 0), (0, 100)])
+
+    assert peachy.collision.point_polygon((10, 10), triangle)
+    assert not peachy.collision.point_polygon((60, 60), triangle)
+    assert peachy.collision.rect_polygon((40, 40, 20, 20), triangle)
+    assert not peachy.collision.rect_polygon((60, 60, 20, 20), triangle)
+    assert peachy.collision.circle_polygon((-10, -10, 12), triangle)
+    assert not peachy.collision.circle_polygon((60, 60, 5), triangle)
+    assert peachy.collision.line_polygon((-10, 50, 110, 50), triangle)
+    assert peachy.collision.polygon_polygon(
+        triangle, triangle.at_point(x=40))
+    assert not peachy.collision.polygon_polygon(
+        triangle, triangle.at_point(x=101))
+
+
+def test_collision_dispatch():
+    rect = peachy.geo.Rect(0, 0, 10, 10)
+    circle = peachy.geo.Circle(0, 0, 5)
+    polygon = peachy.geo.Polygon([(0, 0), (10, 0), (0, 10)])
+
+    get = peachy.collision.get_collision_function
+    assert get(rect, circle) == (peachy.collision.rect_circle, False)
+    assert get(circle, rect) == (peachy.collision.rect_circle, True)
+    assert get(polygon, rect) == (peachy.collision.rect_polygon, True)
+
+    class Ring(peachy.geo.Circle):
+        shapeid = 100
+
+    def ring_rect(ring, rect):
+        return True
+
+    peachy.collision.register_collision_function(
+        100, peachy.geo.ShapeEnum.RECT, ring_rect)
+    try:
+        ring = Ring(50, 50, 1)
+        assert get(ring, circle) == (None, False)
+        assert peachy.collision.collides_unknown(rect, ring)[0]
+    finally:
+        peachy.collision.unregister_collision_function(
+            100, peachy.geo.ShapeEnum.RECT)
+    assert get(ring, rect) == (None, False)
+
+
+def test_sweep_rect():
+    bullet = peachy.geo.Rect(0, 0, 4, 4)
+    wall = peachy.geo.Rect(100, -50, 2, 100)
+    sweep = peachy.collision.sweep
+
+    # A thin wall can not be tunneled through
+    result = sweep(bullet, 200, 0, wall)
+    assert result.time == 0.48
+    assert result.normal == (-1, 0)
+    assert result.shape is wall
+
+    assert sweep(bullet, 50, 0, wall) is None
+    assert sweep(bullet, -200, 0, wall) is None
+    assert sweep(bullet, 200, 200, wall) is None
+
+    # Sliding along a surface is not a collision
+    floor = peachy.geo.Rect(-50, 4, 100, 10)
+    assert sweep(bullet, 20, 0, floor) is None
+    assert sweep(bullet, 0, 5, floor).normal == (0, -1)
+
+
+def test_sweep_circle():
+    circle = peachy.geo.Circle(0, 0, 5)
+    sweep = peachy.collision.sweep
+
+    result = sweep(circle, 100, 0, peachy.geo.Circle(50, 0, 5))
+    assert result.time == 0.4
+    assert result.normal == (-1, 0)
+
+    result = sweep(circle, 100, 0, peachy.geo.Rect(50, -20, 10, 50))
+    assert result.time == 0.4
+    assert result.normal == (-1, 0)
+
+    # Passing the rounded corner of a rect
+    assert sweep(circle, 100, 100, peachy.geo.Rect(68, 50, 10, 10)) is None
+    assert sweep(circle, 100, 100, peachy.geo.Rect(65, 50, 10, 10))
+    assert sweep(peachy.geo.Rect(0, 0, 10, 10), 100, 0, circle.at_point(
+        x=50)).normal == (-1, 0)
+
+
+def test_sweep_solid_and_tiles():
+    room = peachy.Room(None)
+    near_wall = RectEntity(50, 0, 10, 10)
+    far_wall = RectEntity(80, 0, 10, 10)
+    near_wall.solid = far_wall.solid = True
+    room.add(far_wall)
+    room.add(near_wall)
+    mover = room.add(RectEntity(0, 0, 10, 10))
+
+    assert peachy.collision.sweep_solid(room, mover, 100, 0).shape is near_wall
+    room.enable_spatial_hash(cell_size=16)
+    assert peachy.collision.sweep_solid(room, mover, 100, 0).shape is near_wall
+    assert peachy.collision.sweep_solid(room, mover, 0, 100) is None
+
+    tiles = [[0, 0, 0, 0],
+             [0, 0, 0, 1],
+             [1, 1, 1, 1]]
+    result = peachy.collision.sweep_tiles(mover, 100, 0, tiles, 16, 16)
+    assert result is None
+    result = peachy.collision.sweep_tiles(mover, 0, 100, tiles, 16, 16)
+    assert result.time == 0.22
+    assert result.shape == (0, 32, 16, 16)
+
+
+def test_tile_collision_map():
+    tiles = [[0, 0, 0, 0],
+             [0, 0, 0, 1],
+             [1, 1, 1, 1]]
+    tile_map = peachy.collision.TileCollisionMap(tiles, 16, 16)
+
+    assert tile_map.collides_rect(0, 20, 10, 10) is False
+    assert tile_map.collides_rect(0, 22, 10, 10) is False  # Touching
+    assert tile_map.collides_rect(0, 23, 10, 10) is True
+    assert tile_map.collides_rect(-100, -100, 1000, 1000) is True
+    assert tile_map.collides_point(48, 16) is True
+    assert tile_map.collides_point(47, 16) is False
+    assert tile_map.collides_point(100, 100) is False
+    assert tile_map.collides_line(0, 0, 63, 20) is True
+    assert tile_map.collides_line(0, 0, 40, 20) is False
+
+    circle = peachy.geo.Circle(0, 19, 6)
+    assert tile_map.collides(circle) == []
+    hits = tile_map.collides(circle, dy=2)
+    assert [hit.shape for hit in hits] == [(0, 32, 16, 16)]
+
+    tile_map.set_tile(3, 1, 0)
+    assert tile_map.get_tile(3, 1) == 0
+    assert tile_map.get_tile(-1, 1) == 0
+    assert not tile_map.collides_point(56, 24)
+
+    # Tiles outside of the map are ignored rather than wrapping around
+    tile_map.set_tile(-1, 0, 1)
+    tile_map.set_tile(4, 0, 1)
+    tile_map.set_tile(0, 3, 1)
+    assert tiles[0] == [0, 0, 0, 0]
+    assert len(tiles) == 3
+
+
+def test_tile_collision_map_room():
+    room = peachy.Room(None)
+    mover = room.add(RectEntity(0, 0, 10, 10))
+    wall = room.add(RectEntity(30, 0, 10, 10))
+    wall.solid = True
+
+    room.collision_map = peachy.collision.TileCollisionMap(
+        [[0, 0, 0],
+         [1, 1, 1]], 16, 16)
+
+    assert peachy.collision.collides_solid(room, mover) == []
+    hits = peachy.collision.collides_solid(room, mover, dx=25, dy=10)
+    assert len(hits) == 2
+    assert peachy.collision.sweep_solid(room, mover, 0, 100).shape == \
+        (0, 16, 16, 16)
+    assert peachy.collision.sweep_solid(room, mover, 100, 0).shape is wall
+
+
+def test_tile_collision_map_from_layer():
+    class TiledMap(object):
+        tilewidth = 8
+        tileheight = 8
+
+    class TiledTileLayer(object):
+        data = [[0, 5], [7, 0]]
+
+    tile_map = peachy.collision.TileCollisionMap.from_layer(
+        TiledMap(), TiledTileLayer())
+    assert tile_map.tiles == [[0, 1], [1, 0]]
+    assert tile_map.tile_width == 8
+
+    stage = peachy.stage.StageData()
+    stage.width = 3
+    stage.height = 2
+    stage.tile_width = stage.tile_height = 16
+    layer = peachy.stage.StageData.StageLayer()
+    tile = peachy.stage.StageData.StageTile()
+    tile.x, tile.y, tile.gid = 2, 1, 4
+    layer.tiles.append(tile)
+
+    tile_map = peachy.collision.TileCollisionMap.from_layer(stage, layer)
+    assert tile_map.tiles == [[0, 0, 0], [0, 0, 1]]
+    assert tile_map.collides_point(40, 24)
+
+
+def test_collision_offset():
+    room = peachy.Room(None)
+    wall = room.add(RectEntity(100, 0, 10, 100))
+    wall.solid = True
+    wall.group = 'wall'
+    wall.name = 'wall'
+    mover = room.add(RectEntity(0, 0, 10, 10))
+    mover.solid = True
+
+    collision = peachy.collision
+    assert not collision.collides_solid(room, mover)
+    assert not collision.collides_solid(room, mover, dx=90)
+    assert collision.collides_solid(room, mover, dx=95)[0].shape is wall
+    assert collision.collides_group(room, 'wall', mover, dx=95)
+    assert collision.collides_groups(room, ['wall'], mover, dx=95)
+    assert collision.collides_name(room, mover, 'wall', dx=95)
+    assert collision.collides_multiple(room, mover, 95, 0) == [wall]
+    assert mover.x == 0
+
+    circle = CircleEntity(0, 0, 5)
+    assert collision.collides_unknown(circle, wall, dx=96)[0]
+    assert not collision.collides_unknown(circle, wall, dx=80)[0]
+
+    room.enable_spatial_hash(cell_size=16)
+    assert collision.collides_solid(room, mover, dx=95)[0].shape is wall
+    assert collision.collides_first(room, mover, dx=95).shape is wall
+
+
+def test_shapes():
+    rect = peachy.geo.Rect(1, 2, 3, 4)
+    assert not hasattr(rect, '__dict__')
+    assert list(rect) == [1, 2, 3, 4]
+    assert rect[2] == 3
+    assert rect == (1, 2, 3, 4)
+    assert rect == peachy.geo.Rect(1, 2, 3, 4)
+    assert rect.at_point(x=5) == (5, 2, 3, 4)
+    assert peachy.geo.Circle(1, 2, 3) == (1, 2, 3)
+    assert peachy.geo.Line(1, 2, 3, 4) == peachy.geo.Line(1, 2, 3, 4)
+
+    # Entity mixins keep their attributes
+    entity = RectEntity(1, 2, 3, 4)
+    entity.name = 'a'
+    copy = entity.at_point(x=10)
+    assert copy.name == 'a' and copy.x == 10 and entity.x == 1
+    assert entity != RectEntity(1, 2, 3, 4)
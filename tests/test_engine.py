@@ -1,4 +1,6 @@
 import peachy
+import pygame
+import pytest
 import time
 
 engine = None
@@ -8,6 +10,7 @@ def test_startup():
     global engine
     engine = peachy.Engine()
     engine.add_world(peachy.World('TestWorld'))
+    assert engine.scale_mode == engine.config.VIEW_SCALE_MODE
 
 
 def test_resize():
@@ -24,6 +27,87 @@ def test_resize():
     time.sleep(0.25)
 
 
+def test_dirty_rects():
+    engine.dirty_rects = True
+    engine.world.render = lambda: peachy.graphics.draw_rect(10, 10, 8, 8)
+
+    engine._Engine__render()
+    assert engine._dirty_previous == [(10, 10, 8, 8)]
+
+    engine.resize(320, 240)
+    assert engine._dirty_previous is None
+
+    engine.dirty_rects = False
+    engine._Engine__render()
+    assert peachy.graphics.pop_dirty_rects() == []
+
+
+def test_scaling():
+    engine.scale = 1
+    assert engine._canvas_surface is engine._window_surface
+
+    engine.scale = 3
+    assert engine._canvas_surface.get_size() == engine.canvas_size
+    assert engine._window_surface.get_size() == engine.window_size
+
+    engine.scale_mode = peachy.config.SCALE_2X
+    engine._scale_canvas()
+    assert [b.get_width() for b in engine._scale_buffers] == [640]
+
+    with pytest.raises(ValueError):
+        engine.scale_mode = 'unknown'
+    assert engine.scale_mode == peachy.config.SCALE_2X
+
+    engine.scale_mode = peachy.config.SCALE_NEAREST
+    engine.scale = 1
+
+
+def test_dirty_rects_scaling():
+    def present(dirty):
+        engine.dirty_rects = dirty
+        engine.world.render = lambda: peachy.graphics.draw_rect(4, 4, 8, 8)
+        engine._Engine__render()
+        engine.world.render = lambda: peachy.graphics.draw_rect(9, 20, 6, 5)
+        engine._Engine__render()
+        return pygame.image.tostring(engine._window_surface, 'RGB')
+
+    peachy.graphics.set_color(200, 60, 20)
+    for window_size in [(960, 720), (500, 380)]:
+        engine.window_size = window_size
+        engine._window_surface = pygame.display.set_mode(window_size)
+        engine._set_canvas()
+        for mode in peachy.config.SCALE_MODES:
+            engine.scale_mode = mode
+            assert present(True) == present(False), (window_size, mode)
+
+    del engine.world.render
+    engine.scale_mode = peachy.config.SCALE_NEAREST
+    engine.scale = 1
+
+
+def test_fixed_timestep():
+    updates = []
+    engine.world.update = lambda: updates.append(None)
+    engine.config.UPDATES_PER_SECOND = 100
+    engine.config.MAX_FRAMESKIP = 5
+    engine._accumulator = 0
+
+    assert engine._step(5) == 0
+    assert engine._step(20) == 2
+    assert engine.interpolation == 0.5
+
+    # Updates are capped at MAX_FRAMESKIP + 1, the remaining time is dropped
+    assert engine._step(1000) == 6
+    assert engine.interpolation == 0.5
+
+    engine.config.MAX_FRAMESKIP = -1
+    assert engine._step(995) == 100
+    assert len(updates) == 108
+
+    engine.config = peachy.config.PeachyConfiguration()
+    del engine.world.update
+
+
 def test_fullscreen():
     # TODO, this function crashes pytest on Linux... Why?
     engine.toggle_fullscreen()
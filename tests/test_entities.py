@@ -31,3 +31,146 @@ def test_grouping():
     # ents = room.entities[0:10]
     # ents.clear()
     pass
+
+
+def test_group_index():
+    room = peachy.Room(None)
+    a = room.add(peachy.Entity())
+    b = room.add(peachy.Entity())
+    a.group = 'enemy flying'
+    b.group = 'enemy'
+
+    assert room.get_group('enemy') == [a, b]
+    assert room.get_group('flying') == [a]
+    assert len(room.get_group('enemy', 'flying')) == 2
+    assert list(room.group('missing')) == []
+
+    a.group = 'friend'
+    assert room.get_group('enemy') == [b]
+    assert room.get_group('flying') == []
+    assert room.get_group('friend') == [a]
+
+    room.remove_group('enemy')
+    assert b not in room
+    assert room.get_group('enemy') == []
+
+    # Regrouping an entity after removal does not touch the index
+    b.group = 'friend'
+    assert room.get_group('friend') == [a]
+
+
+def test_group_order():
+    room = peachy.Room(None)
+    a = room.add(peachy.Entity())
+    b = room.add(peachy.Entity())
+    c = room.add(peachy.Entity())
+    for entity in (a, b, c):
+        entity.group = 'enemy'
+
+    # Regrouping keeps the entity in its Room position
+    a.group = 'friend'
+    a.group = 'enemy'
+    assert room.get_group('enemy') == [a, b, c] == list(room)
+    assert list(room.group('enemy', 'friend')) == list(room)
+
+    b.order = -1
+    assert room.get_group('enemy') == [b, a, c] == list(room)
+
+    room.sort()
+    assert room.get_group('enemy') == list(room)
+
+
+def test_name_index():
+    room = peachy.Room(None)
+    a = room.add(peachy.Entity())
+    b = peachy.Entity()
+    b.name = 'player'
+    room.add(b)
+
+    assert room.get_name('player') is b
+    assert room.get_name('') is None
+
+    b.name = 'hero'
+    assert room.get_name('player') is None
+    assert room.get_name('hero') is b
+
+    a.name = 'hero'  # duplicate, first added wins
+    assert room.get_name('hero') is b
+    room.remove_name('hero')
+    assert room.get_name('hero') is a
+
+    room.remove(a)
+    assert room.get_name('hero') is None
+
+
+def test_deferred_add_remove():
+    room = peachy.Room(None)
+
+    class Spawner(peachy.Entity):
+        def update(self):
+            self.container.add(peachy.Entity())
+            self.destroy()
+
+    spawner = room.add(Spawner())
+    room.update()
+
+    # Spawned entity is added and spawner removed after the update completes
+    assert len(room) == 1
+    assert spawner not in room
+    assert room[0].container is room
+
+
+def test_ordering():
+    room = peachy.Room(None)
+
+    def make(order):
+        entity = peachy.Entity()
+        entity.order = order
+        return room.add(entity)
+
+    b = make(1)
+    a = make(0)
+    c = make(1)
+    d = make(2)
+    assert list(room) == [a, b, c, d]
+    assert not room.sort_required
+
+    b.order = 3
+    assert list(room) == [a, c, d, b]
+
+    room.remove(c)
+    assert list(room) == [a, d, b]
+
+    # Reordering while updating is applied once the update completes
+    a.update = lambda: setattr(a, 'order', 5)
+    room.update()
+    assert list(room) == [d, b, a]
+
+
+def test_ordering_list_methods():
+    room = peachy.Room(None)
+
+    def make(order):
+        entity = peachy.Entity()
+        entity.order = order
+        return entity
+
+    a, b, c, d = make(0), make(1), make(2), make(3)
+
+    # List methods keep the room ordered
+    room.insert(0, c)
+    room.extend([d, a])
+    room += [b]
+    assert list(room) == [a, b, c, d]
+
+    e = make(4)
+    room[0] = e
+    assert room.pop(0) is b
+    del room[0:1]
+    room.reverse()
+    assert list(room) == [d, e]
+    assert room._order_keys == [3, 4]
+
+    # Ordered inserts land in the right place afterwards
+    room.add(c)
+    assert list(room) == [c, d, e]
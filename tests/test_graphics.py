@@ -0,0 +1,128 @@
+import pygame
+
+import peachy.graphics
+
+
+def setup_module():
+    global canvas
+    canvas = pygame.Surface((64, 64))
+    peachy.graphics.set_default_context(canvas)
+    peachy.graphics.set_context(canvas)
+    peachy.graphics.translate(0, 0)
+
+
+def test_scratch_surfaces():
+    peachy.graphics._scratch_surfaces.clear()
+    canvas.fill((0, 0, 0))
+    peachy.graphics.set_color(255, 0, 0, 128)
+
+    peachy.graphics.draw_rect(0, 0, 8, 8)
+    peachy.graphics.draw_circle(16, 16, 4)
+    peachy.graphics.draw_rect(32, 0, 8, 8)
+    assert len(peachy.graphics._scratch_surfaces) == 1
+
+    r, g, b, _ = canvas.get_at((36, 4))
+    assert 120 <= r <= 136 and g == 0 and b == 0
+
+    for size in range(peachy.graphics.SCRATCH_SURFACE_LIMIT + 8):
+        peachy.graphics.draw_rect(0, 0, size + 1, 1)
+    assert len(peachy.graphics._scratch_surfaces) == \
+        peachy.graphics.SCRATCH_SURFACE_LIMIT
+
+
+def test_translucent_polygon():
+    canvas.fill((0, 0, 0))
+    peachy.graphics.set_color(0, 255, 0, 128)
+    peachy.graphics.translate(10, 10)
+
+    peachy.graphics.draw_polygon([(20, 20), (40, 20), (40, 40), (20, 40)])
+    peachy.graphics.translate(0, 0)
+
+    assert canvas.get_at((15, 15)).g > 0
+    assert canvas.get_at((35, 35)).g == 0
+    assert canvas.get_at((5, 5)).g == 0
+
+
+def test_transform_cache():
+    peachy.graphics.clear_transform_cache()
+    image = pygame.Surface((4, 2))
+    image.fill((255, 0, 0), (0, 0, 1, 2))
+
+    flipped = peachy.graphics.transform(image, peachy.graphics.FLIP_X)
+    assert flipped.get_at((3, 0)) == (255, 0, 0, 255)
+    assert peachy.graphics.transform(image, peachy.graphics.FLIP_X) is flipped
+    assert peachy.graphics.transform(image) is image
+
+    scaled = peachy.graphics.transform(image, scale=2)
+    assert scaled.get_size() == (8, 4)
+    rotated = peachy.graphics.transform(image, rotate=90, scale=2)
+    assert rotated.get_size() == (4, 8)
+    assert set(rotated.get_at((x, y))[:3] for x in range(4)
+               for y in range(8)) == {(255, 0, 0), (0, 0, 0)}
+
+    for angle in range(peachy.graphics.TRANSFORM_CACHE_LIMIT + 8):
+        peachy.graphics.transform(image, rotate=angle + 1)
+    assert len(peachy.graphics._transform_cache) == \
+        peachy.graphics.TRANSFORM_CACHE_LIMIT
+
+
+def test_draw_flipped_uncached():
+    image = pygame.Surface((2, 1))
+    image.fill((255, 0, 0))
+    peachy.graphics.draw(image, 0, 0, peachy.graphics.FLIP_X)
+
+    # Surfaces drawn flipped may change between draws
+    image.fill((0, 255, 0))
+    peachy.graphics.draw(image, 0, 0, peachy.graphics.FLIP_X)
+    assert canvas.get_at((0, 0)) == (0, 255, 0, 255)
+
+
+def test_sprite_map_flipped_frames():
+    source = pygame.Surface((8, 4))
+    source.fill((255, 0, 0), (0, 0, 1, 4))
+    sprites = peachy.graphics.SpriteMap(source, 4, 4)
+    sprites.add('idle', [0])
+    sprites.play('idle', flip_x=True)
+
+    canvas.fill((0, 0, 0))
+    sprites.render(0, 0)
+    sprites.render(0, 0)
+
+    assert canvas.get_at((3, 0)) == (255, 0, 0, 255)
+    assert list(sprites.flipped_frames) == [(0, peachy.graphics.FLIP_X)]
+
+
+def test_draw_list():
+    canvas.fill((0, 0, 0))
+    image = pygame.Surface((4, 4))
+    image.fill((0, 0, 255))
+
+    batch = peachy.graphics.DrawList()
+    batch.add(image, 0, 0)
+    batch.add(image, 100, 100)
+    batch.add(image, 10, 10, area=(0, 0, 2, 2))
+    assert len(batch) == 3
+
+    assert batch.draw(clear=False) == 2
+    assert len(batch) == 3
+    assert canvas.get_at((0, 0)) == (0, 0, 255, 255)
+    assert canvas.get_at((11, 11)) == (0, 0, 255, 255)
+    assert canvas.get_at((12, 12)) == (0, 0, 0, 255)
+
+    peachy.graphics.translate(-60, 0)
+    assert batch.draw() == 1
+    assert len(batch) == 0
+    peachy.graphics.translate(0, 0)
+
+
+def test_draw_list_flipped_area():
+    canvas.fill((0, 0, 0))
+    image = pygame.Surface((4, 1))
+    image.fill((255, 0, 0), (0, 0, 1, 1))
+
+    batch = peachy.graphics.DrawList()
+    batch.add(image, 0, 0, area=(0, 0, 2, 1), args=peachy.graphics.FLIP_X)
+    batch.draw()
+
+    assert canvas.get_at((0, 0)) == (0, 0, 0, 255)
+    assert canvas.get_at((1, 0)) == (255, 0, 0, 255)
@@ -51,6 +51,55 @@ def test_groups():
     assert len(rm) == 0
 
 
+def test_paths():
+    res_a = peachy.resources.Resource('test_a', 'a', 'a.png')
+    res_b = peachy.resources.Resource('test_b', 'b', 'a.png')
+    rm.add_resource(res_a)
+    rm.add_resource(res_b)
+
+    assert 'a.png' in rm
+    assert rm.get_resource('a.png') == 'a'
+    assert rm.remove_resource_by_path('a.png') is res_a
+    assert rm.remove_resource('a.png') is res_b
+    assert 'a.png' not in rm
+    assert len(rm) == 0
+
+
+def test_regroup():
+    res = peachy.resources.Resource('test', None)
+    res.group = 'a'
+    rm.add_resource(res)
+
+    res.group = 'b'
+    assert rm.get_group('a') == []
+    assert rm.get_group('b') == [res]
+
+    rm.remove_group('b')
+    assert len(rm) == 0
+
+
+def test_reindex():
+    res = peachy.resources.Resource('test', 'data', 'a.png')
+    other = peachy.resources.ResourceManager()
+    rm.add_resource(res)
+    other.add_resource(res)
+
+    res.name = 'renamed'
+    res.path = 'b.png'
+    res.group = 'c'
+    for manager in (rm, other):
+        assert 'test' not in manager and 'a.png' not in manager
+        assert manager.get_resource('renamed') == 'data'
+        assert manager.get_resource('b.png') == 'data'
+        assert manager.get_group('c') == [res]
+
+    rm.remove_resource('b.png')
+    assert len(rm) == 0
+    res.group = 'd'
+    assert other.get_group('d') == [res]
+    assert rm.get_group('d') == []
+
+
 def test_outline_bundle():
     RESOURCE_OUTLINE = os.path.join(
         os.path.dirname(os.path.realpath(__file__)), 'res/test_outline.json')
@@ -73,6 +122,43 @@ def test_outline_bundle():
     assert rm.outline is None
 
 
+def test_acquire_release():
+    image_path = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)), 'res/test_png.png')
+    res_type = peachy.resources.ResourceType.IMAGE
+
+    res = rm.acquire_resource(image_path, res_type)
+    assert rm.acquire_resource(image_path, res_type) is res
+    assert res.references == 2
+    assert len(rm) == 1
+
+    assert not rm.release_resource(image_path)
+    assert image_path in rm
+    assert rm.release_resource(image_path)
+    assert image_path not in rm
+
+    # Resources that were added rather than acquired are not released
+    res = rm.add_resource(peachy.resources.Resource('test', None))
+    assert not rm.release_resource('test')
+    assert res.references == 0 and 'test' in rm
+    rm.remove_resource('test')
+
+    # Nor are resources that were loaded explicitly shared
+    loaded = rm.load_resource(image_path, image_path, res_type)
+    assert rm.acquire_resource(image_path, res_type) is None
+    assert not rm.release_resource(image_path)
+    assert rm.get_resource(image_path) is loaded.data
+
+    # Named resources are only shared if they were acquired from the path
+    res = rm.acquire_resource(image_path, res_type, 'image')
+    assert res is not None and res is not loaded
+    assert rm.acquire_resource('other.png', res_type, 'image') is None
+    assert res.references == 1
+    assert rm.release_resource('image')
+    assert 'image' not in rm and rm.resources[image_path] is loaded
+    rm.remove_resource(image_path)
+
+
 def test_shutdown():
     peachy.PC().quit()
     peachy.PC().run()
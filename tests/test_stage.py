@@ -0,0 +1,432 @@
+import array
+import base64
+import collections
+import os
+import shutil
+import zlib
+
+import pygame
+import pytest
+
+import peachy.geo
+import peachy.graphics
+import peachy.resources
+import peachy.stage
+
+RESOURCE_DIRECTORY = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'res')
+
+
+class Stage(object):
+    tilewidth = 16
+    tileheight = 16
+
+
+class Layer(object):
+    def __init__(self, tiles):
+        self._tiles = tiles
+
+    def tiles(self):
+        return iter(self._tiles)
+
+
+class Map(object):
+    tilewidth = 16
+    tileheight = 16
+
+    def __init__(self, images):
+        self.images = images
+
+
+class DataLayer(object):
+    """Mimics pytmx.TiledTileLayer."""
+
+    def __init__(self, stage, data):
+        self.parent = stage
+        self.data = data
+        self.width = len(data[0])
+        self.height = len(data)
+
+    def tiles(self):
+        raise AssertionError('Every tile visited')
+
+
+def tile(color, width=16, height=16):
+    image = pygame.Surface((width, height))
+    image.fill(color)
+    return image
+
+
+def setup_module():
+    global canvas
+    canvas = pygame.Surface((64, 64))
+    peachy.graphics.set_default_context(canvas)
+    peachy.graphics.set_context(canvas)
+
+
+def test_chunked_layer():
+    red = tile((255, 0, 0))
+    layer = Layer([(0, 0, red), (3, 1, red), (20, 20, red), (5, 5, None)])
+    chunks = peachy.stage.ChunkedLayer(Stage(), layer, chunk_size=32)
+    assert sorted(chunks.chunks) == [(0, 0), (1, 0), (10, 10)]
+
+    # Chunks are drawn instead of the layer's tiles
+    layer.chunks = chunks
+    layer._tiles = []
+
+    canvas.fill((0, 0, 0))
+    peachy.graphics.translate(0, 0)
+    peachy.stage.render_tiled_layer(Stage(), layer)
+    assert canvas.get_at((0, 0)) == (255, 0, 0, 255)
+    assert canvas.get_at((50, 20)) == (255, 0, 0, 255)
+    assert canvas.get_at((20, 20)) == (0, 0, 0, 255)
+
+    canvas.fill((0, 0, 0))
+    peachy.graphics.translate(320, 320)
+    chunks.render()
+    peachy.graphics.translate(0, 0)
+    assert canvas.get_at((0, 0)) == (255, 0, 0, 255)
+    assert canvas.get_at((20, 20)) == (0, 0, 0, 255)
+
+
+def test_chunked_layer_large_tiles():
+    layer = Layer([(1, 1, tile((0, 255, 0), 32, 32))])
+    chunks = peachy.stage.ChunkedLayer(Stage(), layer, chunk_size=32)
+    assert sorted(chunks.chunks) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert chunks.chunks[(1, 1)].get_at((15, 15)) == (0, 255, 0, 255)
+    assert chunks.chunks[(1, 1)].get_at((16, 16)) == (0, 0, 0, 0)
+
+
+def test_render_view():
+    red = tile((255, 0, 0))
+    blue = tile((0, 0, 255))
+    stage = Map([None, red, blue])
+    data = [[1] * 100 for _ in range(100)]
+    data[10][10] = 2
+    layer = DataLayer(stage, data)
+
+    visible = list(peachy.stage._visible_tiles(
+        stage, layer, pygame.Rect(150, 150, 32, 32)))
+    assert len(visible) == 9
+    assert (10, 10, blue) in visible
+
+    canvas.fill((0, 0, 0))
+    peachy.graphics.translate(160, 160)
+    peachy.stage.render_tiled_layer(stage, layer)
+    assert canvas.get_at((0, 0)) == (0, 0, 255, 255)
+    assert canvas.get_at((16, 16)) == (255, 0, 0, 255)
+
+    camera = peachy.geo.Rect(-16, -16, 16, 16)
+    canvas.fill((0, 0, 0))
+    peachy.stage.render_tiled_layer(stage, layer, camera)
+    peachy.graphics.translate(0, 0)
+    assert canvas.get_at((0, 0)) == (0, 0, 0, 255)
+
+
+def test_render_view_generic_layer():
+    red = tile((255, 0, 0))
+    layer = Layer([(0, 0, red), (1, 0, red), (9, 9, red)])
+
+    visible = list(peachy.stage._visible_tiles(
+        Stage(), layer, pygame.Rect(8, 0, 16, 16)))
+    assert visible == [(0, 0, red), (1, 0, red)]
+
+
+def test_tile_animator():
+    Frame = collections.namedtuple('Frame', 'gid duration')
+    stage = Map([None, None, None, None])
+    stage.tile_properties = {
+        1: {'frames': [Frame(2, 100), Frame(3, 50)]},
+        2: {},
+    }
+
+    animator = peachy.stage.TileAnimator(stage)
+    assert animator.frames == {1: 2}
+    assert animator.update(99) == []
+    assert animator.update(1) == [1]
+    assert animator.frames[1] == 3
+    assert animator.update(50) == [1]
+    assert animator.frames[1] == 2
+
+
+def test_animated_chunks():
+    Frame = collections.namedtuple('Frame', 'gid duration')
+    red = tile((255, 0, 0))
+    blue = tile((0, 0, 255))
+    stage = Map([None, red, blue])
+    stage.tile_properties = {1: {'frames': [Frame(1, 10), Frame(2, 10)]}}
+    stage.animator = peachy.stage.TileAnimator(stage)
+
+    data = [[0] * 10 for _ in range(10)]
+    data[0][0] = 1
+    data[9][9] = 1
+    layer = DataLayer(stage, data)
+    layer.tiles = lambda: iter([(0, 0, red), (9, 9, red)])
+    chunks = peachy.stage.ChunkedLayer(stage, layer, chunk_size=32)
+    assert chunks._animated == {(0, 0): (1,), (4, 4): (1,)}
+
+    canvas.fill((0, 0, 0))
+    peachy.graphics.translate(0, 0)
+    stage.animator.update(10)
+    chunks.render()
+    assert canvas.get_at((0, 0)) == (0, 0, 255, 255)
+
+    # Chunks outside of the view are not re-rendered
+    assert chunks._baked_frames[(4, 4)] == (1,)
+    assert chunks._baked_frames[(0, 0)] == (2,)
+
+    stage.animator.update(10)
+    chunks.render()
+    assert canvas.get_at((0, 0)) == (255, 0, 0, 255)
+
+    stage.animator.update(10)
+    assert list(peachy.stage._visible_tiles(
+        stage, layer, pygame.Rect(0, 0, 16, 16))) == [(0, 0, blue)]
+
+
+def test_load_stage(tmp_path, monkeypatch):
+    shutil.copy(os.path.join(RESOURCE_DIRECTORY, 'tmx2.tmx'), str(tmp_path))
+    path = str(tmp_path / 'tmx2.tmx')
+
+    stage = peachy.stage.load_stage(path)
+    assert (stage.width, stage.height) == (100, 100)
+    assert (stage.tile_width, stage.tile_height) == (32, 32)
+    assert stage.tilesets[0].firstgid == 1
+    assert stage.tilesets[0].image == str(tmp_path / 'tiles.png')
+
+    layer = stage.layers[0]
+    assert layer.name == 'Tile Layer 1'
+    assert len(layer.gids) == 100 * 100
+    assert layer.data[99][99] == layer.get_gid(99, 99)
+    assert os.path.exists(path + peachy.stage.STAGE_CACHE_EXTENSION)
+
+    # Cached stages are read without parsing the TMX
+    def parse(path):
+        raise AssertionError('TMX parsed')
+    monkeypatch.setattr(peachy.stage, '_parse_tmx', parse)
+
+    cached = peachy.stage.load_stage(path)
+    assert cached.tilesets[0].__dict__ == stage.tilesets[0].__dict__
+    assert cached.layers[0].name == layer.name
+    assert list(cached.layers[0].gids) == list(layer.gids)
+
+    # Modifying the TMX invalidates the cache
+    modified = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(modified, modified))
+    with pytest.raises(AssertionError, match='TMX parsed'):
+        peachy.stage.load_stage(path)
+
+
+def test_load_stage_cache_replaced(tmp_path):
+    shutil.copy(os.path.join(RESOURCE_DIRECTORY, 'tmx2.tmx'), str(tmp_path))
+    path = str(tmp_path / 'tmx2.tmx')
+    cache_path = path + peachy.stage.STAGE_CACHE_EXTENSION
+
+    peachy.stage.load_stage(path)
+    old = peachy.stage.load_stage(path)
+    gids = list(old.layers[0].gids)
+
+    # Stages read out of the previous cache are unaffected by a new one
+    with open(path) as tmx_file:
+        tmx = tmx_file.read().replace('encoding="csv">\n0,',
+                                      'encoding="csv">\n7,')
+    with open(path, 'w') as tmx_file:
+        tmx_file.write(tmx)
+    modified = os.stat(path).st_mtime_ns + 10 ** 9
+    os.utime(path, ns=(modified, modified))
+
+    new = peachy.stage.load_stage(path)
+    assert new.layers[0].get_gid(0, 0) == 7
+    assert list(old.layers[0].gids) == gids
+    assert sorted(os.listdir(str(tmp_path))) == \
+        ['tmx2.tmx', os.path.basename(cache_path)]
+
+    # Truncated caches are rejected
+    with open(cache_path, 'r+b') as cache_file:
+        cache_file.truncate(os.path.getsize(cache_path) - 4)
+    assert peachy.stage.load_stage(path, cache=True).layers[0].get_gid(
+        99, 99) == new.layers[0].get_gid(99, 99)
+
+
+def test_load_stage_encodings(tmp_path):
+    gids = bytes(bytearray([1, 0, 0, 0, 0, 0, 0, 0, 2, 0, 0, 0, 3, 0, 0, 0]))
+    tmx = (
+        '<map width="2" height="2" tilewidth="8" tileheight="8">'
+        '<layer name="csv" width="2" height="2">'
+        '<data encoding="csv">\n1,0,\n2,3\n</data></layer>'
+        '<layer name="zlib" width="2" height="2">'
+        '<data encoding="base64" compression="zlib">{0}</data></layer>'
+        '<layer name="xml" width="2" height="2"><data>'
+        '<tile gid="1"/><tile/><tile gid="2"/><tile gid="3"/>'
+        '</data></layer>'
+        '</map>').format(base64.b64encode(zlib.compress(gids)).decode())
+    path = str(tmp_path / 'encodings.tmx')
+    with open(path, 'w') as tmx_file:
+        tmx_file.write(tmx)
+
+    stage = peachy.stage.load_stage(path, cache=False)
+    assert [list(layer.gids) for layer in stage.layers] == [[1, 0, 2, 3]] * 3
+    assert not os.path.exists(path + peachy.stage.STAGE_CACHE_EXTENSION)
+
+
+def test_shared_tileset_images(tmp_path):
+    pygame.display.set_mode((16, 16))
+    shutil.copy(os.path.join(RESOURCE_DIRECTORY, 'tiles.png'), str(tmp_path))
+    tmx = (
+        '<map width="2" height="1" tilewidth="8" tileheight="8">'
+        '<tileset firstgid="1" name="tiles" tilewidth="8" tileheight="8" '
+        'spacing="1" margin="1" tilecount="60" columns="5">'
+        '<image source="tiles.png" trans="{0}" width="48" height="112"/>'
+        '</tileset>'
+        '<layer name="layer" width="2" height="1">'
+        '<data encoding="csv">1,{1}</data></layer>'
+        '</map>')
+    paths = [str(tmp_path / 'a.tmx'), str(tmp_path / 'b.tmx'),
+             str(tmp_path / 'c.tmx')]
+    for path, trans in zip(paths, ('ff00ff', 'ff00ff', '000000')):
+        with open(path, 'w') as tmx_file:
+            tmx_file.write(tmx.format(trans, 7 | 0x80000000))
+
+    resources = peachy.resources.ResourceManager()
+    a, b, c = [peachy.stage.load_stage(path, cache=False) for path in paths]
+    peachy.stage.load_tileset_images(a, resources)
+    peachy.stage.load_tileset_images(b, resources)
+    tiled = peachy.stage.load_tiled_tmx(paths[0], resources=resources)
+
+    # Every stage shares a single image
+    assert len(resources) == 1
+    assert a.tileset_images[0] is b.tileset_images[0]
+    assert tiled.images[1].get_parent() is a.tileset_images[0]
+    assert a.images[1].get_size() == (8, 8)
+    assert a.images[7 | 0x80000000].get_size() == (8, 8)
+
+    # Pre-rendering is opt-in
+    assert tiled.layers[0].chunks is None
+    chunked = peachy.stage.load_tiled_tmx(paths[1], chunk_size=16)
+    assert isinstance(chunked.layers[0].chunks, peachy.stage.ChunkedLayer)
+
+    # Sharing is opt-in, images are otherwise owned by the stage
+    own = peachy.stage.load_stage(paths[0], cache=False)
+    peachy.stage.load_tileset_images(own)
+    assert own.tileset_images[0] is not a.tileset_images[0]
+    assert len(resources) == 1
+    peachy.stage.unload_stage(own)
+    assert not own.images
+
+    # Tilesets using a different colorkey do not share the image
+    peachy.stage.load_tileset_images(c, resources)
+    assert len(resources) == 2
+    assert a.tileset_images[0].get_colorkey() == (255, 0, 255, 255)
+    assert c.tileset_images[0].get_colorkey() == (0, 0, 0, 255)
+    peachy.stage.unload_stage(c, resources)
+
+    canvas.fill((0, 0, 0))
+    peachy.graphics.translate(0, 0)
+    peachy.stage.render_tiled_layer(a, a.layers[0])
+    assert canvas.get_at((0, 0)) == a.images[1].get_at((0, 0))
+
+    peachy.stage.unload_stage(a, resources)
+    peachy.stage.unload_stage(tiled, resources)
+    assert len(resources) == 1
+    peachy.stage.unload_stage(b, resources)
+    assert len(resources) == 0
+    assert not b.images
+
+
+def streaming_stage():
+    stage = peachy.stage.StageData()
+    stage.width = stage.height = 8
+    stage.tile_width = stage.tile_height = 16
+    stage.images = {1: tile((255, 0, 0))}
+
+    # Region (1, 1) is empty
+    gids = array.array('I', [1] * 64)
+    for x, y in ((2, 2), (3, 2), (2, 3), (3, 3)):
+        gids[y * 8 + x] = 0
+    layer = peachy.stage.StageData.StageLayer()
+    layer.set_gids(gids, 8, 8)
+    stage.layers.append(layer)
+    return stage
+
+
+def test_streaming_stage():
+    region_memory = 32 * 32 * 4
+    streaming = peachy.stage.StreamingStage(
+        streaming_stage(), region_size=32, memory_budget=region_memory * 2,
+        preload=0)
+
+    # Regions read in the background are rendered by the next update
+    streaming.update(pygame.Rect(0, 0, 32, 32))
+    streaming.wait()
+    assert streaming.regions == {}
+    streaming.update(pygame.Rect(0, 0, 32, 32))
+    assert list(streaming.regions) == [(0, 0)]
+    assert streaming.memory == region_memory
+
+    # Regions far from the view are evicted once over budget
+    view = pygame.Rect(64, 0, 64, 32)
+    streaming.update(view)
+    streaming.wait()
+    streaming.update(view)
+    assert sorted(streaming.regions) == [(2, 0), (3, 0)]
+    assert streaming.memory == region_memory * 2
+
+    # Visible regions are loaded when rendered
+    canvas.fill((0, 0, 0))
+    peachy.graphics.translate(0, 0)
+    streaming.render(pygame.Rect(0, 0, 64, 64))
+    assert streaming.regions[(1, 1)] == {}
+    assert canvas.get_at((0, 0)) == (255, 0, 0, 255)
+    assert canvas.get_at((40, 40)) == (0, 0, 0, 255)
+
+    streaming.close()
+
+
+def test_streaming_stage_unthreaded():
+    streaming = peachy.stage.StreamingStage(
+        streaming_stage(), region_size=32, preload=32, threaded=False)
+
+    streaming.update(pygame.Rect(0, 0, 32, 32))
+    assert sorted(streaming.regions) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert streaming._thread is None
+
+    # Pending regions loaded by render() are not loaded again
+    streaming.threaded = True
+    streaming.update(pygame.Rect(96, 96, 32, 32))
+    region = streaming.load_region((2, 2))
+    streaming.wait()
+    streaming.update(pygame.Rect(96, 96, 32, 32))
+    assert streaming.regions[(2, 2)] is region
+    streaming.close()
+
+
+def test_streaming_stage_over_budget():
+    region_memory = 32 * 32 * 4
+    streaming = peachy.stage.StreamingStage(
+        streaming_stage(), region_size=32, memory_budget=region_memory,
+        preload=32)
+
+    decoded = []
+    decode_region = streaming._decode_region
+
+    def count_decodes(key):
+        decoded.append(key)
+        return decode_region(key)
+    streaming._decode_region = count_decodes
+
+    # Regions near the view are kept rather than evicted and read again
+    view = pygame.Rect(0, 0, 32, 32)
+    for _ in range(5):
+        streaming.update(view)
+        streaming.wait()
+    assert sorted(decoded) == [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert sorted(streaming.regions) == sorted(decoded)
+    assert streaming.memory == region_memory * 3
+
+    # While over budget, only regions inside of the view are loaded
+    view = pygame.Rect(32, 32, 32, 32)
+    for _ in range(5):
+        streaming.update(view)
+        streaming.wait()
+    assert len(decoded) == 4
+    streaming.close()